@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set
+
+
+OnFrame = Callable[[dict], Awaitable[None]]
+
+
+async def read_frames(reader: asyncio.StreamReader) -> AsyncIterator[Optional[bytes]]:
+    """Yield the newline-terminated frames from `reader` until EOF.
+
+    A frame longer than the reader's limit is read past and discarded
+    whole, and yields None in its place, so one oversized frame costs that
+    frame rather than the connection.
+    """
+    skipping = False
+    while True:
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError:
+            return
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+            if not skipping:
+                skipping = True
+                yield None
+            continue
+        if skipping:
+            # The end of the oversized frame
+            skipping = False
+            continue
+        yield line
+
+
+class LocalBridge:
+    """In-process stand-in: delivers frames to the other bridges in `peers`.
+
+    A bridge forwards each broadcast to the other server processes (here:
+    other managers in the same process), which deliver it to their own
+    WebSocket clients.
+    """
+
+    def __init__(self, peers: Optional[List['LocalBridge']] = None):
+        self.peers = peers if peers is not None else []
+        self.peers.append(self)
+        self.on_frame: Optional[OnFrame] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self, on_frame: OnFrame):
+        self.on_frame = on_frame
+
+    async def stop(self):
+        self.on_frame = None
+
+    def publish(self, frame: dict):
+        for peer in self.peers:
+            if peer is not self and peer.on_frame is not None:
+                task = asyncio.create_task(peer.on_frame(frame))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+
+class UnixSocketBridge:
+    """Publishes to and receives from a BroadcastBroker over a Unix socket.
+
+    publish() never blocks; frames published while the broker is
+    unreachable, or while more than `max_buffer` bytes are still waiting
+    to be written to it, are dropped, and the bridge keeps reconnecting.
+    """
+
+    def __init__(self, path: str, reconnect_delay: float = 1.0, max_buffer: int = 8 * 2 ** 20):
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.max_buffer = max_buffer
+        self.on_frame: Optional[OnFrame] = None
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+
+    async def start(self, on_frame: OnFrame):
+        self.on_frame = on_frame
+        self._task = asyncio.create_task(self._run())
+
+    async def wait_connected(self, timeout: float = 5.0):
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def publish(self, frame: dict):
+        if self._writer is None:
+            return
+        # A stalled broker must not make this process buffer forever
+        if self._writer.transport.get_write_buffer_size() > self.max_buffer:
+            self.dropped += 1
+            return
+        self._writer.write(json.dumps(frame).encode() + b"\n")
+        self.published += 1
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=2 ** 20)
+            except OSError as e:
+                print(f"Broadcast broker unavailable at {self.path}: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._writer = writer
+            self._connected.set()
+            try:
+                async for line in read_frames(reader):
+                    if line is None:
+                        self.dropped += 1
+                        print("Skipping bridged frame over the stream limit")
+                        continue
+                    self.received += 1
+                    try:
+                        await self.on_frame(json.loads(line))
+                    except Exception as e:
+                        print(f"Error delivering bridged frame: {e}")
+            except ConnectionError as e:
+                print(f"Broadcast broker connection lost: {e}")
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+class BroadcastBroker:
+    """Relays every line a worker sends to all the other connected workers.
+
+    Run it with `python -m app.api.bridge --socket PATH` and point every
+    server process at the same socket with BROADCAST_BRIDGE_SOCKET. It only
+    relays broadcasts: game state isn't shared, so give each process its own
+    pets with PET_OWNED_PREFIXES (see PetRegistry.owns()). A process only
+    publishes frames for pets it owns and ignores relayed frames for them.
+    Don't use `uvicorn --workers N`: it spreads one pet's requests over
+    processes that each keep their own copy of it.
+    """
+
+    def __init__(self, path: str, max_buffer: int = 8 * 2 ** 20):
+        self.path = path
+        self.max_buffer = max_buffer
+        self.writers: Set[asyncio.StreamWriter] = set()
+        self.relayed = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=2 ** 20)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self.writers):
+            writer.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.writers.add(writer)
+        try:
+            async for line in read_frames(reader):
+                if line is None:
+                    print("Skipping frame over the stream limit from a worker")
+                    continue
+                for other in list(self.writers):
+                    if other is writer:
+                        continue
+                    # A worker that stops reading must not make the broker buffer forever
+                    if other.transport.get_write_buffer_size() > self.max_buffer:
+                        print("Dropping unresponsive worker from broadcast broker")
+                        self.writers.discard(other)
+                        other.close()
+                        continue
+                    other.write(line)
+                    self.relayed += 1
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+
+async def serve_broker(path: str):
+    broker = BroadcastBroker(path)
+    await broker.start()
+    print(f"Broadcast broker listening on {path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cross-worker broadcast broker.")
+    parser.add_argument("--socket", default=os.getenv("BROADCAST_BRIDGE_SOCKET", "/tmp/tama-bridge.sock"))
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_broker(args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,370 @@
 import asyncio
 import json
-from typing import List
+import time
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Set, Tuple, Union
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 
+from app.registry import DEFAULT_PET_ID
+from app.llm.commentary import CommentaryTracker
+from app.llm.memory import ConversationMemory
+from app.llm.prefetch import Prefetcher
+from app.llm.streaming import stream_response
+
+
+def encode_state_message(message: dict, tamagotchi_state) -> str:
+    """Encode a message whose "data" is the pet's state.
+    
+    The state part is spliced in from the state's cached snapshot, so
+    sending the same version to many clients serializes it only once.
+    """
+    if tamagotchi_state:
+        message = {**message, "version": tamagotchi_state.version}
+        data = tamagotchi_state.snapshot_text()
+    else:
+        data = "null"
+    header = json.dumps(message)
+    return f'{header[:-1]}, "data": {data}}}'
+
+
+# Message types that carry a pet's full state
+STATE_MESSAGE_TYPES = ("state_update", "welcome")
+
+
+class StateFrame:
+    """A state message built once per send and rendered per client.
+    
+    Clients in delta mode get only the fields that changed since the
+    version they last saw; everyone else gets the full snapshot. Deltas
+    are cached by base version, so clients that are in sync share one
+    encoding. ConnectionManager reuses a frame for as long as the state
+    version it was built from is current.
+    """
+    
+    __slots__ = ("pet_id", "timestamp", "version", "data", "full_text", "_deltas")
+    
+    def __init__(self, message: dict, tamagotchi_state, pet_id: str = DEFAULT_PET_ID):
+        message = {**message, "pet_id": pet_id}
+        self.pet_id = pet_id
+        self.timestamp = message.get("timestamp")
+        self.version = tamagotchi_state.version if tamagotchi_state else None
+        self.data = tamagotchi_state.to_dict() if tamagotchi_state else None
+        self.full_text = encode_state_message(message, tamagotchi_state)
+        self._deltas: Dict[int, str] = {}
+    
+    def to_wire(self) -> dict:
+        """Plain-dict form for sending the frame to other workers."""
+        return {
+            "pet_id": self.pet_id,
+            "timestamp": self.timestamp,
+            "version": self.version,
+            "data": self.data,
+            "full_text": self.full_text
+        }
+    
+    @classmethod
+    def from_wire(cls, wire: dict) -> 'StateFrame':
+        frame = cls.__new__(cls)
+        frame.pet_id = wire["pet_id"]
+        frame.timestamp = wire["timestamp"]
+        frame.version = wire["version"]
+        frame.data = wire["data"]
+        frame.full_text = wire["full_text"]
+        frame._deltas = {}
+        return frame
+    
+    def delta_text(self, base_version: int, base_data: dict) -> str:
+        text = self._deltas.get(base_version)
+        if text is None:
+            changes = {key: value for key, value in self.data.items() if base_data.get(key) != value}
+            text = self._deltas[base_version] = json.dumps({
+                "type": "state_delta",
+                "pet_id": self.pet_id,
+                "timestamp": self.timestamp,
+                "base_version": base_version,
+                "version": self.version,
+                "changes": changes
+            })
+        return text
+
+
+class ClientConnection:
+    """One WebSocket client with its own bounded outbound queue and writer task.
+    
+    Messages queued with a coalesce key (state updates, keyed by pet ID)
+    coalesce: a newer one supersedes the one with the same key that is still
+    waiting, so a lagging client only ever gets the freshest state of each
+    pet. Everything else is delivered in order.
+    """
+    
+    def __init__(self, websocket: WebSocket, max_queue_size: int, delta_mode: bool = False):
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        self.delta_mode = delta_mode
+        self.pet_ids: Set[str] = set()
+        # pet_id -> (version, data) this client last received, for delta encoding
+        self.seen: Dict[str, Tuple[int, dict]] = {}
+        # Entries are [message, coalesce_key] lists so a superseded one can be blanked in place
+        self._pending: Deque[list] = deque()
+        self._pending_latest: Dict[str, list] = {}
+        self._size = 0
+        self._ready = asyncio.Event()
+        self.full_since: Optional[float] = None
+        self.dropped_messages = 0
+        self.coalesced_messages = 0
+        self.writer_task: Optional[asyncio.Task] = None
+    
+    def enqueue(self, message: Union[str, StateFrame], coalesce_key: Optional[str] = None) -> bool:
+        """Queue a message without blocking. Returns False if the queue is full."""
+        stale = self._pending_latest.get(coalesce_key) if coalesce_key is not None else None
+        if stale is not None:
+            # Drop the stale copy; the new one goes to the back, after
+            # any action results queued since, so ordering is kept
+            stale[0] = None
+            self._size -= 1
+            self.coalesced_messages += 1
+        elif self._size >= self.max_queue_size:
+            self.dropped_messages += 1
+            if self.full_since is None:
+                self.full_since = time.monotonic()
+            return False
+        
+        if len(self._pending) > 2 * self.max_queue_size:
+            # Don't let superseded entries pile up behind a stuck client
+            self._pending = deque(e for e in self._pending if e[0] is not None)
+        entry = [message, coalesce_key]
+        self._pending.append(entry)
+        self._size += 1
+        if coalesce_key is not None:
+            self._pending_latest[coalesce_key] = entry
+        self.full_since = None
+        self._ready.set()
+        return True
+    
+    async def next_message(self) -> Union[str, StateFrame]:
+        """Wait for the next message that hasn't been superseded."""
+        while True:
+            while not self._pending:
+                self._ready.clear()
+                await self._ready.wait()
+            entry = self._pending.popleft()
+            if entry[1] is not None and self._pending_latest.get(entry[1]) is entry:
+                del self._pending_latest[entry[1]]
+            if entry[0] is not None:
+                self._size -= 1
+                return entry[0]
+    
+    def queue_size(self) -> int:
+        return self._size
+    
+    def render(self, message: Union[str, StateFrame]) -> Optional[str]:
+        """Turn a queued message into the text to send (None: nothing to send)."""
+        if isinstance(message, str):
+            return message
+        if not self.delta_mode or message.data is None:
+            return message.full_text
+        seen = self.seen.get(message.pet_id)
+        if seen is None:
+            text = message.full_text
+        elif message.data == seen[1]:
+            return None
+        else:
+            text = message.delta_text(*seen)
+        self.seen[message.pet_id] = (message.version, message.data)
+        return text
+    
+    def full_for(self) -> float:
+        """Seconds the queue has been continuously full (0 if it isn't)."""
+        return 0.0 if self.full_since is None else time.monotonic() - self.full_since
+
 
 class ConnectionManager:
-    """Manages WebSocket connections for real-time updates."""
+    """Manages WebSocket connections for real-time updates.
+    
+    Every connection gets a bounded send queue drained by its own writer
+    task, so broadcasting never waits on a client. A client whose queue
+    stays full for longer than slow_client_timeout seconds is disconnected.
+    Pending state updates are coalesced per client and pet (latest wins).
+    
+    Clients subscribe to the pets they view; pet-scoped broadcasts only
+    reach that pet's room. With a bridge (see app.api.bridge), broadcasts
+    are also relayed to the clients of other server processes: only those
+    for pets this process owns (`owns`), and relayed ones only for pets it
+    doesn't, so another process can't overwrite a pet served here.
+    """
     
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, max_queue_size: int = 100, slow_client_timeout: float = 5.0, bridge=None,
+                 owns: Optional[Callable[[str], bool]] = None):
+        self.max_queue_size = max_queue_size
+        self.slow_client_timeout = slow_client_timeout
+        self.bridge = bridge
+        self.owns = owns or (lambda pet_id: True)
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.rooms: Dict[str, Set[WebSocket]] = {}
+        # (message type, pet_id) -> the last StateFrame built, reused while its version is current
+        self._frames: Dict[Tuple[str, str], StateFrame] = {}
+        self._closing = set()
     
-    async def connect(self, websocket: WebSocket):
-        """Accept and store a new WebSocket connection."""
+    async def start_bridge(self):
+        """Start receiving broadcasts relayed from other workers."""
+        if self.bridge is not None:
+            await self.bridge.start(self.deliver_bridged)
+    
+    async def stop_bridge(self):
+        if self.bridge is not None:
+            await self.bridge.stop()
+    
+    async def deliver_bridged(self, frame: dict):
+        """Deliver a broadcast relayed from another worker to local clients only."""
+        if frame.get("pet_id") is not None and self.owns(frame["pet_id"]):
+            return
+        if frame["kind"] == "state":
+            message = StateFrame.from_wire(frame["message"])
+        else:
+            message = frame["message"]
+        self._fan_out(message, frame.get("pet_id"), frame.get("coalesce_key"))
+    
+    async def connect(self, websocket: WebSocket, pet_id: str = DEFAULT_PET_ID, delta_mode: bool = False):
+        """Accept and store a new WebSocket connection, subscribed to one pet."""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = ClientConnection(websocket, self.max_queue_size, delta_mode)
+        connection.writer_task = asyncio.create_task(self._writer(connection))
+        self.active_connections[websocket] = connection
+        self.subscribe(websocket, pet_id)
         print(f"WebSocket connected. Total connections: {len(self.active_connections)}")
     
+    def subscribe(self, websocket: WebSocket, pet_id: str):
+        """Add a connection to a pet's room."""
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return
+        connection.pet_ids.add(pet_id)
+        self.rooms.setdefault(pet_id, set()).add(websocket)
+    
+    def unsubscribe(self, websocket: WebSocket, pet_id: str):
+        """Remove a connection from a pet's room."""
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            connection.pet_ids.discard(pet_id)
+            connection.seen.pop(pet_id, None)
+        room = self.rooms.get(pet_id)
+        if room is not None:
+            room.discard(websocket)
+            if not room:
+                del self.rooms[pet_id]
+                for kind in STATE_MESSAGE_TYPES:
+                    self._frames.pop((kind, pet_id), None)
+    
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection."""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return
+        for pet_id in list(connection.pet_ids):
+            self.unsubscribe(websocket, pet_id)
+        del self.active_connections[websocket]
+        if connection.writer_task and connection.writer_task is not asyncio.current_task():
+            connection.writer_task.cancel()
         print(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
     
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        """Send a message to a specific WebSocket connection."""
+    async def _writer(self, connection: ClientConnection):
+        """Drain one connection's queue onto its socket."""
         try:
-            await websocket.send_text(json.dumps(message))
+            while True:
+                message_json = connection.render(await connection.next_message())
+                if message_json is not None:
+                    await connection.websocket.send_text(message_json)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+            print(f"Error sending to connection: {e}")
+            self.disconnect(connection.websocket)
     
-    async def broadcast(self, message: dict):
-        """Broadcast a message to all connected WebSocket clients."""
-        if not self.active_connections:
+    async def _close_slow_client(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1008, reason="Client too slow"), timeout=1.0)
+        except Exception:
+            pass
+    
+    def _enqueue(self, connection: ClientConnection, message, coalesce_key: Optional[str] = None):
+        if connection.enqueue(message, coalesce_key) or connection.full_for() <= self.slow_client_timeout:
             return
-        
-        message_json = json.dumps(message)
-        disconnected = []
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_json)
-            except Exception as e:
-                print(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
-        
-        # Clean up disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+        print(f"Dropping slow WebSocket client ({connection.dropped_messages} messages dropped)")
+        self.disconnect(connection.websocket)
+        task = asyncio.create_task(self._close_slow_client(connection.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
     
-    async def broadcast_state_update(self, tamagotchi_state):
-        """Broadcast Tamagotchi state update to all clients."""
-        message = {
-            "type": "state_update",
-            "timestamp": datetime.now().isoformat(),
-            "data": tamagotchi_state.to_dict() if tamagotchi_state else None
-        }
-        await self.broadcast(message)
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        """Send a message to a specific WebSocket connection."""
+        await self.send_personal_text(json.dumps(message), websocket)
+    
+    async def send_personal_text(self, message_json: Union[str, StateFrame], websocket: WebSocket,
+                                 coalesce_key: Optional[str] = None):
+        """Queue an already encoded message (or state frame) for one connection."""
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            self._enqueue(connection, message_json, coalesce_key)
+    
+    async def broadcast(self, message: dict, pet_id: Optional[str] = None):
+        """Broadcast a message to a pet's room, or to every client if pet_id is None."""
+        if not self._recipients(pet_id) and self.bridge is None:
+            return
+        await self.broadcast_text(json.dumps(message), pet_id)
+    
+    async def broadcast_text(self, message_json: Union[str, StateFrame], pet_id: Optional[str] = None,
+                             coalesce_key: Optional[str] = None):
+        """Queue an already encoded message (or state frame) for a pet's room or everyone."""
+        self._fan_out(message_json, pet_id, coalesce_key)
+        if self.bridge is not None and (pet_id is None or self.owns(pet_id)):
+            is_state = isinstance(message_json, StateFrame)
+            self.bridge.publish({
+                "kind": "state" if is_state else "text",
+                "pet_id": pet_id,
+                "coalesce_key": coalesce_key,
+                "message": message_json.to_wire() if is_state else message_json
+            })
+    
+    def _fan_out(self, message: Union[str, StateFrame], pet_id: Optional[str], coalesce_key: Optional[str]):
+        for websocket in list(self._recipients(pet_id)):
+            connection = self.active_connections.get(websocket)
+            if connection is not None:
+                self._enqueue(connection, message, coalesce_key)
+    
+    def _recipients(self, pet_id: Optional[str]):
+        if pet_id is None:
+            return self.active_connections
+        return self.rooms.get(pet_id, ())
     
-    async def broadcast_action_result(self, action: str, result: dict, response: str = ""):
-        """Broadcast action result to all clients."""
+    async def broadcast_state_update(self, tamagotchi_state, pet_id: str = DEFAULT_PET_ID):
+        """Broadcast Tamagotchi state update to the pet's room."""
+        if not self._recipients(pet_id) and self.bridge is None:
+            return
+        await self.broadcast_text(
+            self._state_frame("state_update", tamagotchi_state, pet_id), pet_id, coalesce_key=pet_id
+        )
+    
+    async def send_state_update(self, websocket: WebSocket, tamagotchi_state, pet_id: str = DEFAULT_PET_ID):
+        """Send the current Tamagotchi state to one client.
+        
+        For delta clients this is also the resync path: the next state they
+        are sent for this pet goes out in full.
+        """
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            connection.seen.pop(pet_id, None)
+        await self.send_personal_text(
+            self._state_frame("state_update", tamagotchi_state, pet_id), websocket, coalesce_key=pet_id
+        )
+    
+    async def broadcast_action_result(self, action: str, result: dict, response: str = "",
+                                      pet_id: str = DEFAULT_PET_ID):
+        """Broadcast action result to the pet's room."""
         message = {
             "type": "action_result",
+            "pet_id": pet_id,
             "action": action,
             "timestamp": datetime.now().isoformat(),
             "success": result.get("success", False),
@@ -70,54 +372,107 @@ class ConnectionManager:
             "stat_changes": result.get("stat_changes", {}),
             "response": response
         }
-        await self.broadcast(message)
+        await self.broadcast(message, pet_id)
     
-    async def broadcast_chat_message(self, response: str, mood: str):
-        """Broadcast chat message from Tamagotchi."""
+    async def broadcast_chat_message(self, response: str, mood: str, pet_id: str = DEFAULT_PET_ID):
+        """Broadcast chat message from Tamagotchi to the pet's room."""
         message = {
             "type": "chat_message",
+            "pet_id": pet_id,
             "timestamp": datetime.now().isoformat(),
             "response": response,
             "mood": mood
         }
-        await self.broadcast(message)
+        await self.broadcast(message, pet_id)
     
-    async def send_welcome_message(self, websocket: WebSocket, tamagotchi_state):
-        """Send welcome message to newly connected client."""
+    async def broadcast_chat_delta(self, stream_id: str, text: str, pet_id: str = DEFAULT_PET_ID):
+        """Broadcast the next piece of a reply that is still being generated."""
         message = {
-            "type": "welcome",
+            "type": "chat_delta",
+            "pet_id": pet_id,
+            "stream_id": stream_id,
+            "text": text
+        }
+        await self.broadcast(message, pet_id)
+    
+    async def broadcast_chat_done(self, stream_id: str, response: str, mood: str, pet_id: str = DEFAULT_PET_ID):
+        """Broadcast the end of a streamed reply along with its full text."""
+        message = {
+            "type": "chat_done",
+            "pet_id": pet_id,
+            "stream_id": stream_id,
             "timestamp": datetime.now().isoformat(),
-            "message": "Connected to Tamagotchi!",
-            "data": tamagotchi_state.to_dict() if tamagotchi_state else None
+            "response": response,
+            "mood": mood
         }
-        await self.send_personal_message(message, websocket)
+        await self.broadcast(message, pet_id)
+    
+    async def send_welcome_message(self, websocket: WebSocket, tamagotchi_state, pet_id: str = DEFAULT_PET_ID):
+        """Send welcome message to newly connected client."""
+        await self.send_personal_text(self._state_frame("welcome", tamagotchi_state, pet_id), websocket)
+    
+    def _state_frame(self, kind: str, tamagotchi_state, pet_id: str) -> StateFrame:
+        """The frame of type `kind` for the state's current version, built once per version.
+        
+        A reconnect storm or a burst of get_state requests then serializes
+        the state once, not once per client.
+        """
+        key = (kind, pet_id)
+        frame = self._frames.get(key)
+        if frame is not None and tamagotchi_state is not None and frame.version == tamagotchi_state.version:
+            return frame
+        message = {"type": kind, "timestamp": datetime.now().isoformat()}
+        if kind == "welcome":
+            message["message"] = "Connected to Tamagotchi!"
+        frame = StateFrame(message, tamagotchi_state, pet_id)
+        if tamagotchi_state is not None:
+            self._frames[key] = frame
+        return frame
     
     def get_connection_count(self) -> int:
         """Get the number of active connections."""
         return len(self.active_connections)
+    
+    def get_room_size(self, pet_id: str) -> int:
+        """Get the number of connections subscribed to a pet."""
+        return len(self.rooms.get(pet_id, ()))
 
 
 class WebSocketHandler:
     """Handles WebSocket events and messages."""
     
-    def __init__(self, connection_manager: ConnectionManager, game_engine, llm_client):
+    def __init__(self, connection_manager: ConnectionManager, pet_registry, llm_client, deadline_scheduler=None,
+                 commentary: Optional[CommentaryTracker] = None, prefetcher: Optional[Prefetcher] = None,
+                 memory: Optional[ConversationMemory] = None):
         self.connection_manager = connection_manager
-        self.game_engine = game_engine
+        self.pet_registry = pet_registry
         self.llm_client = llm_client
+        self.deadline_scheduler = deadline_scheduler
+        self.commentary = commentary or CommentaryTracker(llm_client, connection_manager)
+        self.prefetcher = prefetcher
+        self.memory = memory or ConversationMemory()
     
-    async def handle_websocket(self, websocket: WebSocket):
+    async def get_pet_state(self, pet_id: str):
+        """Current state of a pet, or None if there's no such pet."""
+        engine = self.pet_registry.get(pet_id)
+        return await engine.get_state() if engine else None
+    
+    async def handle_websocket(self, websocket: WebSocket, pet_id: str = DEFAULT_PET_ID):
         """Main WebSocket handler."""
-        await self.connection_manager.connect(websocket)
+        # Clients opt into delta-encoded state updates with /ws?deltas=1
+        await self.connection_manager.connect(
+            websocket, pet_id, delta_mode=websocket.query_params.get("deltas") == "1"
+        )
         
         # Send welcome message with current state
-        current_state = await self.game_engine.get_state()
-        await self.connection_manager.send_welcome_message(websocket, current_state)
+        current_state = await self.get_pet_state(pet_id)
+        await self.connection_manager.send_welcome_message(websocket, current_state, pet_id)
         
         try:
             while True:
                 # Wait for client messages
                 data = await websocket.receive_text()
-                await self.handle_client_message(websocket, data)
+                await self.handle_client_message(websocket, data, pet_id)
         
         except WebSocketDisconnect:
             self.connection_manager.disconnect(websocket)
@@ -125,11 +480,13 @@ class WebSocketHandler:
             print(f"WebSocket error: {e}")
             self.connection_manager.disconnect(websocket)
     
-    async def handle_client_message(self, websocket: WebSocket, data: str):
+    async def handle_client_message(self, websocket: WebSocket, data: str, default_pet_id: str = DEFAULT_PET_ID):
         """Handle incoming client messages."""
         try:
             message = json.loads(data)
             message_type = message.get("type")
+            # Messages may target another pet; by default they go to the one the socket opened with
+            pet_id = message.get("pet_id") or default_pet_id
             
             if message_type == "ping":
                 # Respond to ping with pong
@@ -140,20 +497,25 @@ class WebSocketHandler:
             
             elif message_type == "get_state":
                 # Send current state to client
-                current_state = await self.game_engine.get_state()
-                await self.connection_manager.send_personal_message({
-                    "type": "state_update",
-                    "timestamp": datetime.now().isoformat(),
-                    "data": current_state.to_dict() if current_state else None
-                }, websocket)
+                current_state = await self.get_pet_state(pet_id)
+                await self.connection_manager.send_state_update(websocket, current_state, pet_id)
+            
+            elif message_type == "subscribe":
+                # Start receiving a pet's updates, beginning with its current state
+                self.connection_manager.subscribe(websocket, pet_id)
+                current_state = await self.get_pet_state(pet_id)
+                await self.connection_manager.send_state_update(websocket, current_state, pet_id)
+            
+            elif message_type == "unsubscribe":
+                self.connection_manager.unsubscribe(websocket, pet_id)
             
             elif message_type == "action":
                 # Handle game actions
-                await self.handle_action_message(message)
+                await self.handle_action_message(message, pet_id)
             
             elif message_type == "chat":
                 # Handle chat messages
-                await self.handle_chat_message(message)
+                await self.handle_chat_message(message, pet_id)
             
             else:
                 await self.connection_manager.send_personal_message({
@@ -176,37 +538,46 @@ class WebSocketHandler:
                 "timestamp": datetime.now().isoformat()
             }, websocket)
     
-    async def handle_action_message(self, message: dict):
+    async def handle_action_message(self, message: dict, pet_id: str = DEFAULT_PET_ID):
         """Handle game action messages."""
         action = message.get("action")
+        engine = self.pet_registry.get(pet_id)
+        
+        if engine is None:
+            await self.connection_manager.broadcast({
+                "type": "error",
+                "message": f"No Tamagotchi found with id: {pet_id}",
+                "timestamp": datetime.now().isoformat()
+            }, pet_id)
+            return
+        
+        # Replies are cached under the state the action was taken in
+        before_state = await engine.get_state()
+        before_state = before_state.model_copy() if before_state else None
         
         if action == "feed":
-            result = await self.game_engine.feed()
+            result = await engine.feed()
         elif action == "play":
-            result = await self.game_engine.play()
+            result = await engine.play()
         elif action == "sleep":
-            result = await self.game_engine.sleep()
+            result = await engine.sleep()
         elif action == "pet":
-            result = await self.game_engine.pet()
+            result = await engine.pet()
         elif action == "revive":
-            result = await self.game_engine.revive()
+            result = await engine.revive()
         else:
             await self.connection_manager.broadcast({
                 "type": "error",
                 "message": f"Unknown action: {action}",
                 "timestamp": datetime.now().isoformat()
-            })
+            }, pet_id)
             return
         
-        # Get current state and LLM response
-        current_state = await self.game_engine.get_state()
-        llm_response = await self.llm_client.get_response(
-            current_state,
-            action=action,
-            action_result=result.model_dump()
-        )
+        current_state = await engine.get_state()
+        if self.deadline_scheduler:
+            self.deadline_scheduler.schedule(pet_id, self.pet_registry.next_deadline(pet_id, current_state))
         
-        # Broadcast action result
+        # Broadcast action result and updated state without waiting for the LLM
         await self.connection_manager.broadcast_action_result(
             action,
             {
@@ -214,24 +585,36 @@ class WebSocketHandler:
                 "message": result.message,
                 "stat_changes": result.stat_changes
             },
-            llm_response
+            pet_id=pet_id
         )
+        await self.connection_manager.broadcast_state_update(current_state, pet_id)
         
-        # Broadcast updated state
-        await self.connection_manager.broadcast_state_update(current_state)
+        # The pet's reaction follows as a "commentary" message
+        self.commentary.start(pet_id, current_state, action, result.model_dump(), key_state=before_state)
+        if self.prefetcher:
+            self.prefetcher.on_state_change(current_state, pet_id)
     
-    async def handle_chat_message(self, message: dict):
-        """Handle chat messages."""
+    async def handle_chat_message(self, message: dict, pet_id: str = DEFAULT_PET_ID):
+        """Handle chat messages, streaming the reply as chat_delta frames."""
         user_message = message.get("message", "")
+        stream_id = uuid.uuid4().hex
         
-        current_state = await self.game_engine.get_state()
-        llm_response = await self.llm_client.get_response(
+        current_state = await self.get_pet_state(pet_id)
+        chunks = []
+        async for chunk in stream_response(
+            self.llm_client,
             current_state,
             action="talk",
-            user_message=user_message
-        )
+            user_message=user_message,
+            action_result=self.memory.talk_result(pet_id)
+        ):
+            chunks.append(chunk)
+            await self.connection_manager.broadcast_chat_delta(stream_id, chunk, pet_id)
         
-        await self.connection_manager.broadcast_chat_message(
-            llm_response,
-            current_state.current_mood if current_state else "😐"
-        )
\ No newline at end of file
+        self.memory.add_turn(pet_id, user_message, "".join(chunks))
+        await self.connection_manager.broadcast_chat_done(
+            stream_id,
+            "".join(chunks),
+            current_state.current_mood if current_state else "😐",
+            pet_id
+        )
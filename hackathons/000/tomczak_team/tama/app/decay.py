@@ -0,0 +1,96 @@
+import os
+from typing import NamedTuple, Optional
+
+from app.models.tamagotchi import TamagotchiState
+
+
+class DecayRates(NamedTuple):
+    """Stat changes applied by one background tick, and the tick length in seconds."""
+
+    hunger: int = 1
+    happiness: int = -1
+    energy: int = -1
+    interval: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "DecayRates":
+        return cls(
+            hunger=int(os.getenv("TAMAGOTCHI_HUNGER_PER_TICK", "1")),
+            happiness=int(os.getenv("TAMAGOTCHI_HAPPINESS_PER_TICK", "-1")),
+            energy=int(os.getenv("TAMAGOTCHI_ENERGY_PER_TICK", "-1")),
+            interval=float(os.getenv("TAMAGOTCHI_UPDATE_INTERVAL", "10"))
+        )
+
+
+def tick_state(state: TamagotchiState, rates: DecayRates) -> bool:
+    """Apply one tick of decay to a living pet; returns True if it died."""
+    if not state.is_alive:
+        return False
+    state.hunger = max(0, min(100, state.hunger + rates.hunger))
+    state.happiness = max(0, min(100, state.happiness + rates.happiness))
+    state.energy = max(0, min(100, state.energy + rates.energy))
+    if state.should_die():
+        state.kill()
+        return True
+    state.update_mood()
+    return False
+
+
+def _ticks_to_bound(distance: int, step: int) -> Optional[int]:
+    """First tick (>= 1) at which a stat `distance` away from a bound, moving
+    `step` toward it per tick, reaches it; None if it never does."""
+    if step > 0:
+        return max(1, -(-distance // step))
+    if step == 0 and distance <= 0:
+        return 1
+    return None
+
+
+def ticks_until_death(state: TamagotchiState, rates: DecayRates) -> Optional[int]:
+    """How many ticks from now a living pet dies if nobody cares for it."""
+    if not state.is_alive:
+        return None
+    ticks = [
+        _ticks_to_bound(100 - state.hunger, rates.hunger),
+        _ticks_to_bound(state.happiness, -rates.happiness),
+        _ticks_to_bound(state.energy, -rates.energy)
+    ]
+    ticks = [tick for tick in ticks if tick is not None]
+    return min(ticks) if ticks else None
+
+
+def ticks_until_critical(state: TamagotchiState, rates: DecayRates) -> Optional[int]:
+    """How many ticks until a living pet newly enters a critical mood band:
+    starving (hunger >= 90), exhausted (energy <= 10) or miserable (happiness <= 10)."""
+    if not state.is_alive:
+        return None
+    ticks = []
+    if state.hunger < 90:
+        ticks.append(_ticks_to_bound(90 - state.hunger, rates.hunger))
+    if state.energy > 10:
+        ticks.append(_ticks_to_bound(state.energy - 10, -rates.energy))
+    if state.happiness > 10:
+        ticks.append(_ticks_to_bound(state.happiness - 10, -rates.happiness))
+    ticks = [tick for tick in ticks if tick is not None]
+    return min(ticks) if ticks else None
+
+
+def decay_state(state: TamagotchiState, rates: DecayRates, ticks: int) -> bool:
+    """Apply `ticks` ticks of decay at once; same result as tick_state() `ticks` times.
+
+    Each stat moves by a constant step and is clamped to 0-100, so after k
+    ticks it is simply clamp(value + k * step), up to the tick the pet dies.
+    """
+    if not state.is_alive or ticks <= 0:
+        return False
+    death = ticks_until_death(state, rates)
+    dies = death is not None and death <= ticks
+    steps = death if dies else ticks
+    state.hunger = max(0, min(100, state.hunger + steps * rates.hunger))
+    state.happiness = max(0, min(100, state.happiness + steps * rates.happiness))
+    state.energy = max(0, min(100, state.energy + steps * rates.energy))
+    if dies:
+        state.kill()
+        return True
+    state.update_mood()
+    return False
@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+
+# Most urgent first; a lower index is admitted before a higher one
+PRIORITY_CLASSES = ("talk", "action", "create", "prefetch")
+PRIORITY = {name: index for index, name in enumerate(PRIORITY_CLASSES)}
+
+# Asked to give an admitted request's slot back; True if the request is being cancelled
+Preempt = Callable[[], bool]
+
+
+def priority_for(action: str) -> int:
+    """Admission priority of a real (non-prefetch) request for `action`."""
+    if action in ("talk", "create"):
+        return PRIORITY[action]
+    return PRIORITY["action"]
+
+
+class AdmissionController:
+    """Admits LLM requests by priority under concurrency and rate limits.
+    
+    At most `max_in_flight` requests run at once. Requests-per-minute and
+    tokens-per-minute token buckets (tokens estimated at
+    `tokens_per_request`) keep the client under its quota instead of
+    running into 429s. Waiting requests are admitted most urgent first,
+    FIFO within a priority class.
+    
+    A request admitted with a `preempt` callback (a prefetch) can be asked
+    to give its slot back: when a more urgent request has to queue because
+    every slot is taken, one such holder's callback is called. It returns
+    True if it's cancelling its request (which then releases as usual) and
+    False if it can no longer be interrupted.
+    """
+    
+    def __init__(self, max_in_flight: int = 4, requests_per_minute: int = 120, tokens_per_minute: int = 60000,
+                 tokens_per_request: int = 300, clock: Callable[[], float] = time.monotonic):
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.tokens_per_request = tokens_per_request
+        self.clock = clock
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.preempted = 0
+        self.admitted = [0] * len(PRIORITY_CLASSES)
+        self.waits: Deque[Tuple[int, float]] = deque(maxlen=1000)
+        self._request_budget = float(requests_per_minute)
+        self._token_budget = float(tokens_per_minute)
+        self._refilled_at = clock()
+        # Heap of [priority, seq, future, key]; a None future marks an entry replaced by promote()
+        self._queue: List[list] = []
+        self._waiting: Dict[Hashable, list] = {}
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # preempt callback -> priority, for admitted requests that can be asked to give way
+        self._preemptible: Dict[Preempt, int] = {}
+    
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.max_in_flight
+    
+    async def acquire(self, priority: int, key: Optional[Hashable] = None, preempt: Optional[Preempt] = None):
+        """Wait until the request may run; pair every acquire() with a release(preempt)."""
+        start = self.clock()
+        if not self._queue and self.has_capacity() and self._rate_wait() == 0:
+            self._take_slot()
+            self._record_wait(priority, start)
+            if preempt is not None:
+                self._preemptible[preempt] = priority
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future, key]
+        heapq.heappush(self._queue, entry)
+        if key is not None:
+            self._waiting[key] = entry
+        self._dispatch()
+        if not future.done() and not self.has_capacity():
+            self._preempt_for(priority)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Admitted just before being cancelled: hand the slot back
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if key is not None:
+                waiting = self._waiting.get(key)
+                if waiting is not None and waiting[2] is future:
+                    del self._waiting[key]
+        self._record_wait(future.result(), start)
+        if preempt is not None:
+            self._preemptible[preempt] = future.result()
+    
+    def promote(self, key: Hashable, priority: int):
+        """Move a waiting request up to `priority`, e.g. when a real caller joins a prefetch."""
+        entry = self._waiting.get(key)
+        if entry is None or entry[0] <= priority or entry[2] is None or entry[2].done():
+            return
+        promoted = [priority, entry[1], entry[2], key]
+        entry[2] = None
+        heapq.heappush(self._queue, promoted)
+        self._waiting[key] = promoted
+        self._dispatch()
+    
+    def release(self, preempt: Optional[Preempt] = None):
+        if preempt is not None:
+            self._preemptible.pop(preempt, None)
+        self.in_flight -= 1
+        self._dispatch()
+    
+    def queue_depth(self) -> List[int]:
+        depth = [0] * len(PRIORITY_CLASSES)
+        for priority, _, future, _ in self._queue:
+            if future is not None and not future.done():
+                depth[priority] += 1
+        return depth
+    
+    def stats(self) -> dict:
+        depth = self.queue_depth()
+        classes = {}
+        for priority, name in enumerate(PRIORITY_CLASSES):
+            waits = sorted(wait for p, wait in self.waits if p == priority)
+            classes[name] = {
+                "queued": depth[priority],
+                "admitted": self.admitted[priority],
+                "wait_p50_ms": round(_percentile(waits, 0.5) * 1000, 1),
+                "wait_p95_ms": round(_percentile(waits, 0.95) * 1000, 1)
+            }
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": sum(depth),
+            "rate_limited": self.rate_limited,
+            "preempted": self.preempted,
+            "classes": classes
+        }
+    
+    def _preempt_for(self, priority: int):
+        """Ask one less urgent slot holder to give way; most expendable first."""
+        for preempt, held_priority in sorted(self._preemptible.items(), key=lambda item: -item[1]):
+            if held_priority <= priority:
+                return
+            # Each holder is asked once; it stays busy until it releases
+            del self._preemptible[preempt]
+            if preempt():
+                self.preempted += 1
+                return
+    
+    def _take_slot(self):
+        self.in_flight += 1
+        self._request_budget -= 1
+        self._token_budget -= self.tokens_per_request
+    
+    def _record_wait(self, priority: int, start: float):
+        self.admitted[priority] += 1
+        self.waits.append((priority, self.clock() - start))
+    
+    def _dispatch(self):
+        while self._queue and self.has_capacity():
+            priority, _, future, _ = self._queue[0]
+            if future is None or future.done():
+                heapq.heappop(self._queue)
+                continue
+            wait = self._rate_wait()
+            if wait > 0:
+                if self._timer is None:
+                    self.rate_limited += 1
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._on_timer)
+                return
+            heapq.heappop(self._queue)
+            self._take_slot()
+            # acquire() records the wait once it resumes
+            future.set_result(priority)
+    
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+    
+    def _rate_wait(self) -> float:
+        """Seconds until both buckets can cover one more request."""
+        now = self.clock()
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._request_budget = min(
+            self.requests_per_minute, self._request_budget + elapsed * self.requests_per_minute / 60
+        )
+        self._token_budget = min(
+            self.tokens_per_minute, self._token_budget + elapsed * self.tokens_per_minute / 60
+        )
+        return max(
+            0.0,
+            (1 - self._request_budget) * 60 / self.requests_per_minute,
+            (self.tokens_per_request - self._token_budget) * 60 / self.tokens_per_minute
+        )
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
@@ -0,0 +1,255 @@
+import asyncio
+import inspect
+import json
+from typing import Awaitable, Callable, List, Optional, Set
+
+from app.llm.admission import AdmissionController, Preempt
+from app.llm.prompt import PET_LEGEND, PET_VOICE, StablePrompt, describe_pet
+
+
+SendBatch = Callable[[str], Awaitable[str]]
+
+# Runs call(True) and, if it's slow, a backup call(False); returns the first reply
+Hedged = Callable[[int, Callable[[bool], Awaitable[str]]], Awaitable[str]]
+
+# Everything that doesn't change between calls lives here so the prompt prefix is
+# byte-identical on every request and the provider can cache it; build_batch_prompt()
+# only produces the short per-batch suffix.
+BATCH_SYSTEM_PROMPT = (
+    "You voice several Tamagotchi pets at once. Each numbered request describes one pet "
+    "and what just happened to it. Reply in character as that pet with one short line of "
+    "dark humor that fits its mood and stats. Answer with only a JSON array of strings, "
+    "one reply per request, in request order.\n"
+    "\n"
+    + PET_LEGEND +
+    "Actions: feed, play, sleep and pet are care from the owner; revive brings a dead pet "
+    "back; talk carries a message from the owner to answer; create is a newborn pet "
+    "introducing itself. A dead pet speaks from beyond the grave.\n"
+    "\n"
+    + PET_VOICE +
+    "\n"
+    "Keep every reply under 30 words, never mention being an AI and never break character."
+)
+
+BATCH_PROMPT = StablePrompt(BATCH_SYSTEM_PROMPT)
+
+
+def build_batch_prompt(items: List[dict]) -> str:
+    lines = []
+    for number, item in enumerate(items, 1):
+        state = item["state"]
+        result = item.get("action_result") or {}
+        lines.append(
+            f"{number}. {describe_pet(state)} - action: {item['action']}"
+            + (f", result: {result.get('message')}" if result.get("message") else "")
+            + (f", says: {item['user_message']}" if item.get("user_message") else "")
+        )
+    return f"{len(items)} requests:\n" + "\n".join(lines)
+
+
+def parse_batch_reply(text: str, count: int) -> Optional[List[str]]:
+    """The replies in a batched completion, or None if it isn't exactly `count` non-empty strings."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").partition("\n")[2]
+    try:
+        replies = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(replies, dict):
+        replies = replies.get("replies")
+    if not isinstance(replies, list) or len(replies) != count:
+        return None
+    if not all(isinstance(reply, str) and reply.strip() for reply in replies):
+        return None
+    return [reply.strip() for reply in replies]
+
+
+def chat_completion_sender(chat_client, model: str, prompt: StablePrompt = BATCH_PROMPT) -> Optional[SendBatch]:
+    """A SendBatch over an OpenAI chat client (sync or async), or None without one."""
+    if chat_client is None or not model:
+        return None
+    create = chat_client.chat.completions.create
+    
+    async def send_batch(batch_prompt: str) -> str:
+        kwargs = dict(model=model, messages=prompt.messages(batch_prompt))
+        if inspect.iscoroutinefunction(create):
+            completion = await create(**kwargs)
+        else:
+            completion = await asyncio.to_thread(create, **kwargs)
+        prompt.record_usage(getattr(completion, "usage", None))
+        return completion.choices[0].message.content or ""
+    
+    return send_batch
+
+
+class CommentaryBatcher:
+    """Collects commentary requests for `window` seconds and sends them as one LLM call.
+    
+    The batched completion must be a JSON array with one reply per request;
+    if it fails validation (or the call fails), every request in the batch
+    falls back to its own get_response() call. Single requests are never
+    batched.
+    
+    Requests passed with `cancellable` (prefetches) let a call made up only
+    of them give its admission slot back to a more urgent request: the call
+    is cancelled, and so are their futures, as long as every one of them
+    still says it may be.
+    
+    Requests that go out on their own are hedged through `hedged` when the
+    owner sets it (LLMGateway does); batches never are.
+    """
+    
+    def __init__(self, llm_client, send_batch: Optional[SendBatch], window: float = 0.05, max_batch: int = 16,
+                 admission: Optional[AdmissionController] = None):
+        self.llm_client = llm_client
+        self.send_batch = send_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.admission = admission
+        self.hedged: Optional[Hedged] = None
+        self.batches = 0
+        self.batched_requests = 0
+        self.fallbacks = 0
+        self._pending: List[dict] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # In-flight sends; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def get_response(self, tamagotchi_state, action: str, user_message: Optional[str] = None,
+                           action_result: Optional[dict] = None, priority: int = 0,
+                           cancellable: Optional[Callable[[], bool]] = None) -> str:
+        if self.send_batch is None:
+            return await self._single(tamagotchi_state, action, user_message, action_result, priority, cancellable)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append({
+            "state": tamagotchi_state,
+            "action": action,
+            "user_message": user_message,
+            "action_result": action_result,
+            "priority": priority,
+            "cancellable": cancellable,
+            "future": future
+        })
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+    
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "batch_fallbacks": self.fallbacks
+        }
+    
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        items = [item for item in self._pending if not item["future"].done()]
+        self._pending = []
+        if items:
+            task = asyncio.ensure_future(self._send(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def stop(self):
+        """Send whatever is still collecting and wait for every send in flight."""
+        self._flush()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    async def _send(self, items: List[dict]):
+        try:
+            if len(items) > 1:
+                replies = await self._batched(items)
+                if replies is not None:
+                    self.batches += 1
+                    self.batched_requests += len(items)
+                    for item, reply in zip(items, replies):
+                        if not item["future"].done():
+                            item["future"].set_result(reply)
+                    return
+                self.fallbacks += 1
+            
+            await asyncio.gather(*[self._resolve_single(item) for item in items])
+        except asyncio.CancelledError:
+            # Preempted: these were all prefetches, which end as cancelled
+            for item in items:
+                item["future"].cancel()
+            raise
+    
+    async def _batched(self, items: List[dict]) -> Optional[List[str]]:
+        priority = min(item["priority"] for item in items)
+        preempt = _preempter([item["cancellable"] for item in items])
+        try:
+            if self.admission is not None:
+                await self.admission.acquire(priority, preempt=preempt)
+            try:
+                text = await self.send_batch(build_batch_prompt(items))
+            finally:
+                if self.admission is not None:
+                    self.admission.release(preempt)
+        except Exception as e:
+            print(f"Batched commentary failed, falling back to single calls: {e}")
+            return None
+        return parse_batch_reply(text, len(items))
+    
+    async def _resolve_single(self, item: dict):
+        try:
+            reply = await self._single(
+                item["state"], item["action"], item["user_message"], item["action_result"], item["priority"],
+                item["cancellable"]
+            )
+        except asyncio.CancelledError:
+            item["future"].cancel()
+            return
+        except Exception as e:
+            if not item["future"].done():
+                item["future"].set_exception(e)
+            return
+        if not item["future"].done():
+            item["future"].set_result(reply)
+    
+    async def _single(self, tamagotchi_state, action: str, user_message: Optional[str],
+                      action_result: Optional[dict], priority: int,
+                      cancellable: Optional[Callable[[], bool]] = None) -> str:
+        if self.hedged is None:
+            return await self._call(tamagotchi_state, action, user_message, action_result, priority, cancellable)
+        return await self.hedged(priority, lambda _: self._call(
+            tamagotchi_state, action, user_message, action_result, priority, cancellable
+        ))
+    
+    async def _call(self, tamagotchi_state, action: str, user_message: Optional[str],
+                    action_result: Optional[dict], priority: int,
+                    cancellable: Optional[Callable[[], bool]] = None) -> str:
+        preempt = _preempter([cancellable])
+        if self.admission is not None:
+            await self.admission.acquire(priority, preempt=preempt)
+        try:
+            return await self.llm_client.get_response(
+                tamagotchi_state,
+                action=action,
+                user_message=user_message,
+                action_result=action_result
+            )
+        finally:
+            if self.admission is not None:
+                self.admission.release(preempt)
+
+
+def _preempter(cancellables: List[Optional[Callable[[], bool]]]) -> Optional[Preempt]:
+    """A Preempt that cancels the current task while every request in it may still be cancelled."""
+    if not all(cancellables):
+        return None
+    task = asyncio.current_task()
+    
+    def preempt() -> bool:
+        if not all(cancellable() for cancellable in cancellables):
+            return False
+        task.cancel()
+        return True
+    
+    return preempt
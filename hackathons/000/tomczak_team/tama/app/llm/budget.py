@@ -0,0 +1,96 @@
+import random
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.llm.admission import PRIORITY_CLASSES
+
+
+# Instant replies for when the LLM misses its deadline, by action
+FALLBACK_LINES = {
+    "feed": [
+        "*chews* Food. The only thing standing between me and the void.",
+        "Finally. I was about to start eating the pixels.",
+        "Another meal closer to the inevitable. Thanks, I guess."
+    ],
+    "play": [
+        "Wheee. This is me having fun. Can't you tell?",
+        "Playing distracts me from my finite lifespan. Again!",
+        "Fine, I'll play. It's not like I have anywhere else to be."
+    ],
+    "sleep": [
+        "Zzz... dreaming of a world without neglect...",
+        "Goodnight. Try not to forget I exist while I'm out.",
+        "Sleep: the closest thing to death I can get without trying."
+    ],
+    "pet": [
+        "*purrs suspiciously* What do you want?",
+        "Okay, that was nice. Don't tell anyone.",
+        "Physical affection. Noted. Logged. Appreciated."
+    ],
+    "revive": [
+        "I'm back. The afterlife had terrible Wi-Fi anyway.",
+        "You brought me back? Bold of you to assume I wanted that.",
+        "Death was boring. Let's try this again."
+    ],
+    "create": [
+        "Hello, world. Please keep me alive. No pressure.",
+        "I exist now. That's on you."
+    ],
+    "talk": [
+        "Sorry, I zoned out contemplating my mortality. What were you saying?",
+        "Hmm. Give me a second, my tiny brain is buffering."
+    ]
+}
+
+# Moods that override the action's lines, except for a revive
+MOOD_LINES = {
+    "💀": ["...", "*remains dead*"],
+    "😵": ["Too... hungry... to... think...", "Is that food? Please tell me that's food."],
+    "😴": ["*yawns* Can't... keep... eyes... open...", "So tired. Everything is a blur."],
+    "😢": ["Whatever. Nothing matters anyway.", "*sniffles* I'm fine. Totally fine."]
+}
+
+
+def fallback_response(tamagotchi_state, action: str) -> str:
+    """An instant template reply that fits the pet's mood and the action."""
+    mood = tamagotchi_state.current_mood if tamagotchi_state else "😐"
+    if action != "revive" and mood in MOOD_LINES:
+        return random.choice(MOOD_LINES[mood])
+    return random.choice(FALLBACK_LINES.get(action, FALLBACK_LINES["talk"]))
+
+
+FALLBACK_REPLIES = frozenset(line for lines in (*FALLBACK_LINES.values(), *MOOD_LINES.values()) for line in lines)
+
+
+def is_fallback(reply: str) -> bool:
+    """Whether a reply is one of fallback_response()'s templates rather than the model's."""
+    return reply in FALLBACK_REPLIES
+
+
+class LatencyTracker:
+    """Recent LLM call latencies per priority class, for percentiles and hedge delays."""
+    
+    def __init__(self, window: int = 500):
+        self.samples: Dict[int, Deque[float]] = {
+            priority: deque(maxlen=window) for priority in range(len(PRIORITY_CLASSES))
+        }
+    
+    def record(self, priority: int, seconds: float):
+        self.samples[priority].append(seconds)
+    
+    def percentile(self, priority: int, fraction: float, min_samples: int = 1) -> Optional[float]:
+        samples = self.samples[priority]
+        if len(samples) < min_samples or not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+    
+    def stats(self) -> dict:
+        stats = {}
+        for priority, name in enumerate(PRIORITY_CLASSES):
+            if self.samples[priority]:
+                stats[name] = {
+                    f"p{int(fraction * 100)}_ms": round(self.percentile(priority, fraction) * 1000, 1)
+                    for fraction in (0.5, 0.95, 0.99)
+                }
+        return stats
@@ -0,0 +1,90 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of LLM replies whose entries expire after `ttl` seconds.
+    
+    Tracks hits, misses, evictions and expirations, and an approximate
+    memory footprint of the cached keys and replies.
+    """
+    
+    def __init__(self, max_size: int = 100, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.memory_bytes = 0
+        # key -> (expires_at, reply, entry size in bytes)
+        self._entries: "OrderedDict[Hashable, Tuple[float, str, int]]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= self.clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether `key` has a live entry; unlike get() this doesn't count as a lookup."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self.clock()
+    
+    def put(self, key: Hashable, value: str, ttl: Optional[float] = None):
+        """Store a reply for `ttl` seconds (at most the cache's own ttl)."""
+        if key in self._entries:
+            self._remove(key)
+        size = _approx_size(key) + sys.getsizeof(value)
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (self.clock() + ttl, value, size)
+        self.memory_bytes += size
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+    
+    def clear(self):
+        self._entries.clear()
+        self.memory_bytes = 0
+    
+    def clear_namespace(self, namespace: str):
+        """Drop the entries whose key is a tuple starting with `namespace`."""
+        for key in [k for k in self._entries if isinstance(k, tuple) and k and k[0] == namespace]:
+            self._remove(key)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cache_size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "memory_bytes": self.memory_bytes
+        }
+    
+    def _remove(self, key: Hashable):
+        self.memory_bytes -= self._entries.pop(key)[2]
+
+
+def _approx_size(key) -> int:
+    if isinstance(key, tuple):
+        return sys.getsizeof(key) + sum(_approx_size(item) for item in key)
+    return sys.getsizeof(key)
@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+
+class CommentaryTracker:
+    """Generates LLM commentary in the background and pushes it when ready.
+    
+    Actions are applied and broadcast right away; the pet's reaction follows
+    as a separate "commentary" message once the LLM answers. Recent results
+    are kept so REST clients can fetch them by commentary ID. `llm_client`
+    is an LLMGateway, asked to wait past the action deadline since nobody
+    is blocked on the reply.
+    """
+    
+    def __init__(self, llm_client, connection_manager, max_results: int = 1000):
+        self.llm_client = llm_client
+        self.connection_manager = connection_manager
+        self.max_results = max_results
+        self.results: "OrderedDict[str, dict]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def start(self, pet_id: str, tamagotchi_state, action: str, action_result: Optional[dict] = None,
+              user_message: Optional[str] = None, key_state=None) -> str:
+        """Start generating commentary for an action and return its ID.
+        
+        key_state is the state before the action, which the reply is cached under.
+        """
+        commentary_id = uuid.uuid4().hex
+        self._remember(commentary_id, {
+            "commentary_id": commentary_id,
+            "pet_id": pet_id,
+            "action": action,
+            "status": "pending",
+            "response": None
+        })
+        # Comment on the state right after the action, not whatever it is by the time the LLM runs
+        task = asyncio.create_task(self._generate(
+            commentary_id, pet_id, tamagotchi_state.model_copy(), action, action_result, user_message, key_state
+        ))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return commentary_id
+    
+    def get(self, commentary_id: str) -> Optional[dict]:
+        return self.results.get(commentary_id)
+    
+    def pending_count(self) -> int:
+        return len(self._tasks)
+    
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    def _remember(self, commentary_id: str, entry: Dict):
+        self.results[commentary_id] = entry
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+    
+    async def _generate(self, commentary_id: str, pet_id: str, tamagotchi_state, action: str,
+                        action_result: Optional[dict], user_message: Optional[str], key_state):
+        entry = self.results.get(commentary_id, {})
+        try:
+            response = await self.llm_client.get_response(
+                tamagotchi_state,
+                action=action,
+                user_message=user_message,
+                action_result=action_result,
+                pet_id=pet_id,
+                key_state=key_state,
+                # Nobody is blocked on commentary: wait for the real reply, not a fallback
+                wait=True
+            )
+        except Exception as e:
+            print(f"Error generating commentary for {action}: {e}")
+            entry.update(status="failed")
+            return
+        
+        entry.update(status="ready", response=response)
+        await self.connection_manager.broadcast({
+            "type": "commentary",
+            "pet_id": pet_id,
+            "commentary_id": commentary_id,
+            "action": action,
+            "timestamp": datetime.now().isoformat(),
+            "response": response,
+            "mood": tamagotchi_state.current_mood
+        }, pet_id)
@@ -0,0 +1,151 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class DiskResponseCache:
+    """SQLite-backed second tier for LLM replies that survives restarts.
+    
+    Entries are namespaced per pet so one pet can be invalidated without
+    touching the others. With a `ttl`, entries expire that many seconds
+    after they were written and are neither served nor warmed afterwards.
+    Once more than `max_entries` are stored, the least recently used ones
+    are evicted. Hits only note the entry's new last-used time in memory;
+    those are written out together on the next put() (or once
+    `max_pending_touches` have piled up), so a hit costs no write.
+    Methods block on disk I/O; async callers run them with asyncio.to_thread().
+    """
+    
+    def __init__(self, path: str, max_entries: int = 10000, ttl: Optional[float] = None,
+                 max_pending_touches: int = 256):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_pending_touches = max_pending_touches
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        # (namespace, encoded key) -> last used time not yet written to disk
+        self._touches: Dict[Tuple[str, str], float] = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                response TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}
+        if "expires_at" not in columns:
+            # Caches written before entries could expire; NULL never expires
+            self._db.execute("ALTER TABLE responses ADD COLUMN expires_at REAL")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+        self._db.commit()
+    
+    def get(self, namespace: str, key: Hashable) -> Optional[str]:
+        encoded = json.dumps(key)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM responses WHERE namespace = ? AND key = ?", (namespace, encoded)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] is not None and row[1] <= now:
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._touches[(namespace, encoded)] = now
+            if len(self._touches) >= self.max_pending_touches:
+                self._write_touches()
+                self._db.commit()
+            self.hits += 1
+            return row[0]
+    
+    def put(self, namespace: str, key: Hashable, response: str):
+        now = time.time()
+        with self._lock:
+            self._write_touches()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (namespace, key, response, last_used, expires_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (namespace, json.dumps(key), response, now, now + self.ttl if self.ttl else None)
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._db.execute(
+                "DELETE FROM responses WHERE rowid IN ("
+                " SELECT rowid FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+    
+    def recent(self, limit: int) -> List[Tuple[str, tuple, str, Optional[float]]]:
+        """The `limit` most recently used live entries, oldest first, as
+        (namespace, key, response, seconds until it expires or None)."""
+        now = time.time()
+        with self._lock:
+            self._write_touches()
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT namespace, key, response, expires_at FROM responses"
+                " WHERE expires_at IS NULL OR expires_at > ? ORDER BY last_used DESC LIMIT ?",
+                (now, limit)
+            ).fetchall()
+        return [
+            (namespace, _to_tuple(json.loads(key)), response, None if expires_at is None else expires_at - now)
+            for namespace, key, response, expires_at in reversed(rows)
+        ]
+    
+    def clear_namespace(self, namespace: str):
+        with self._lock:
+            self._touches = {k: v for k, v in self._touches.items() if k[0] != namespace}
+            self._db.execute("DELETE FROM responses WHERE namespace = ?", (namespace,))
+            self._db.commit()
+    
+    def clear(self):
+        with self._lock:
+            self._touches.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+    
+    def _write_touches(self):
+        # Caller holds the lock and commits
+        if self._touches:
+            self._db.executemany(
+                "UPDATE responses SET last_used = ? WHERE namespace = ? AND key = ?",
+                [(last_used, namespace, key) for (namespace, key), last_used in self._touches.items()]
+            )
+            self._touches.clear()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    
+    def stats(self) -> dict:
+        return {
+            "disk_size": len(self),
+            "disk_hits": self.hits,
+            "disk_misses": self.misses,
+            "disk_expirations": self.expirations
+        }
+    
+    def close(self):
+        with self._lock:
+            self._write_touches()
+            self._db.commit()
+            self._db.close()
+
+
+def _to_tuple(value):
+    if isinstance(value, list):
+        return tuple(_to_tuple(item) for item in value)
+    return value
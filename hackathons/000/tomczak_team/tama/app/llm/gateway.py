@@ -0,0 +1,414 @@
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.llm.admission import PRIORITY, AdmissionController, priority_for
+from app.llm.batching import CommentaryBatcher
+from app.llm.budget import LatencyTracker, fallback_response
+from app.llm.cache import ResponseCache
+from app.llm.disk_cache import DiskResponseCache
+from app.llm.response_bank import ResponseBank
+from app.llm.streaming import StreamReply, build_talk_prompt, stream_response
+from app.registry import DEFAULT_PET_ID
+
+
+# Stats are compared in buckets of this many points when matching prompts
+STAT_BUCKET = 10
+
+# Free-form chat is never answered from the cache
+UNCACHED_ACTIONS = {"talk"}
+
+
+def action_outcome(action_result: Optional[dict]) -> Optional[dict]:
+    """The parts of an action result that change the reply.
+    
+    Only the outcome and any talk context count: its message and exact
+    stat changes follow from the action and the state.
+    """
+    if not action_result:
+        return None
+    return {k: action_result.get(k) for k in ("success", "action_context", "conversation") if k in action_result}
+
+
+def prompt_key(tamagotchi_state, action: str, user_message: Optional[str] = None,
+               action_result: Optional[dict] = None) -> Tuple:
+    """Normalized inputs of a prompt; requests with equal keys get equivalent replies."""
+    action_result = action_outcome(action_result)
+    return (
+        action,
+        tamagotchi_state.name,
+        tamagotchi_state.is_alive,
+        tamagotchi_state.current_mood,
+        tamagotchi_state.hunger // STAT_BUCKET,
+        tamagotchi_state.happiness // STAT_BUCKET,
+        tamagotchi_state.energy // STAT_BUCKET,
+        tamagotchi_state.get_neglect_level(),
+        user_message,
+        json.dumps(action_result, sort_keys=True, default=str) if action_result else None
+    )
+
+
+class LLMGateway:
+    """Sits in front of TamagotchiLLMClient with the same interface.
+    
+    Replies are cached per pet by prompt_key(), so stats only need to land
+    in the same 10-point buckets for a cached reply to be reused. Lookups
+    go to the in-memory cache, then the optional on-disk cache, then the
+    client. Concurrent requests with the same key share a single call to
+    the client (single-flight).
+    
+    Action replies are keyed by the state *before* the action (key_state),
+    which is what prefetch() can predict: it warms the cache for an action
+    the player hasn't taken yet. Prefetches give way to real requests: a
+    real request that finds no free slot preempts the least urgent running
+    prefetch, just the one, and only while no real caller has joined it.
+    
+    With an AdmissionController, calls to the client wait for a slot in
+    priority order (talk, action, create, prefetch) within rate limits.
+    With a CommentaryBatcher, commentary (everything but talk) for several
+    pets is generated in shared batched calls.
+    
+    Each priority class can have a deadline (seconds, in `deadlines`): a
+    caller still waiting when it passes gets fallback_response() instead,
+    while the real reply carries on into the cache. With `hedge`, a single
+    call still running after that class's p95 latency gets a second,
+    identical request, and whichever answers first wins.
+    
+    With a ResponseBank, commentary for any (action, mood, neglect level)
+    the bank covers is served from it without touching the LLM; the live
+    model is left for free-form talk and whatever the bank lacks. The bank
+    is looked up by key_state, like the cache, and only for actions that
+    succeeded: its lines were all generated for successful ones.
+    
+    stream_response() streams from `streamer` (a chat completion with
+    stream=True) when there is one, else from the client. It takes an
+    admission slot like any other call, and its class deadline applies to
+    the first piece of the reply.
+    """
+    
+    def __init__(self, llm_client, cache: Optional[ResponseCache] = None,
+                 disk_cache: Optional[DiskResponseCache] = None, admission: Optional[AdmissionController] = None,
+                 batcher: Optional[CommentaryBatcher] = None, deadlines: Optional[Dict[str, float]] = None,
+                 hedge: bool = False, hedge_min_samples: int = 20, bank: Optional[ResponseBank] = None,
+                 streamer: Optional[StreamReply] = None):
+        self.llm_client = llm_client
+        self.cache = cache if cache is not None else ResponseCache()
+        self.disk_cache = disk_cache
+        self.admission = admission
+        self.batcher = batcher
+        if batcher is not None:
+            batcher.hedged = self._call_hedged
+        self.deadlines = {PRIORITY[name]: seconds for name, seconds in (deadlines or {}).items()}
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.bank = bank
+        self.streamer = streamer
+        self.latency = LatencyTracker()
+        self.responses = 0
+        self.fallbacks = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.coalesced_calls = 0
+        self.prefetches = 0
+        self.prefetch_hits = 0
+        self.prefetches_cancelled = 0
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self._prefetching: Dict[Tuple, asyncio.Future] = {}
+        # Keys warmed by a finished prefetch that no real request has used yet
+        self._prefetched_keys: Dict[Tuple, bool] = {}
+    
+    @property
+    def client(self):
+        return self.llm_client.client
+    
+    def warm(self) -> int:
+        """Load the most recently used on-disk replies into memory; returns how many."""
+        if self.disk_cache is None:
+            return 0
+        entries = self.disk_cache.recent(self.cache.max_size)
+        for namespace, key, response, expires_in in entries:
+            self.cache.put((namespace, key), response, ttl=expires_in)
+        return len(entries)
+    
+    async def get_response(self, tamagotchi_state, action: str, user_message: Optional[str] = None,
+                           action_result: Optional[dict] = None, pet_id: str = DEFAULT_PET_ID,
+                           key_state=None, wait: bool = False) -> str:
+        """The reply for a request, from the bank, the caches or the client.
+        
+        The class deadline only applies to callers someone is blocked on;
+        with `wait` (background work like commentary) the real reply is
+        awaited however long it takes.
+        """
+        key_state = key_state or tamagotchi_state
+        key = (pet_id, prompt_key(key_state, action, user_message, action_result))
+        cacheable = action not in UNCACHED_ACTIONS
+        priority = priority_for(action)
+        self.responses += 1
+        if self._bank_serves(action, action_result):
+            line = self.bank.lookup_state(key_state, action)
+            if line is not None:
+                return line
+        if cacheable:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if self._prefetched_keys.pop(key, False):
+                    self.prefetch_hits += 1
+                return cached
+        
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced_calls += 1
+            # A real caller depends on this one now, so it's no longer a cancellable prefetch
+            if self._prefetching.pop(key, None) is not None:
+                self.prefetch_hits += 1
+                if self.admission is not None:
+                    self.admission.promote(key, priority)
+        else:
+            in_flight = self._start(key, cacheable, priority, tamagotchi_state, action, user_message, action_result)
+        
+        # shield() so one caller going away (or timing out) doesn't cancel the others' request
+        deadline = self.deadlines.get(priority)
+        if not deadline or wait:
+            return await asyncio.shield(in_flight)
+        try:
+            return await asyncio.wait_for(asyncio.shield(in_flight), deadline)
+        except asyncio.TimeoutError:
+            self.fallbacks += 1
+            return fallback_response(tamagotchi_state, action)
+    
+    def prefetch(self, tamagotchi_state, action: str, pet_id: str = DEFAULT_PET_ID,
+                 action_result: Optional[dict] = None) -> bool:
+        """Start warming the cache for a likely next action; False if it's already warm or on its way."""
+        if action in UNCACHED_ACTIONS:
+            return False
+        if self._bank_serves(action, action_result) and self.bank.covers_state(tamagotchi_state, action):
+            return False
+        key = (pet_id, prompt_key(tamagotchi_state, action, None, action_result))
+        if key in self.cache or key in self._in_flight:
+            return False
+        
+        future = self._start(key, True, PRIORITY["prefetch"], tamagotchi_state, action, None, action_result)
+        self._prefetching[key] = future
+        future.add_done_callback(lambda f: self._prefetch_done(key, f))
+        self.prefetches += 1
+        return True
+    
+    def _bank_serves(self, action: str, action_result: Optional[dict]) -> bool:
+        if self.bank is None or action in UNCACHED_ACTIONS:
+            return False
+        return not action_result or action_result.get("success", True)
+    
+    def cancel_prefetches(self):
+        for future in list(self._prefetching.values()):
+            future.cancel()
+    
+    def _prefetch_done(self, key: Tuple, future: asyncio.Future):
+        if self._prefetching.pop(key, None) is None:
+            return
+        if future.cancelled():
+            self.prefetches_cancelled += 1
+        elif future.exception() is None:
+            self._prefetched_keys[key] = True
+            while len(self._prefetched_keys) > self.cache.max_size:
+                del self._prefetched_keys[next(iter(self._prefetched_keys))]
+    
+    def _start(self, key: Tuple, cacheable: bool, priority: int, tamagotchi_state, action: str,
+               user_message: Optional[str], action_result: Optional[dict]) -> asyncio.Future:
+        future = asyncio.ensure_future(self._fetch(
+            key, cacheable, priority, tamagotchi_state, action, user_message, action_result
+        ))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return future
+    
+    async def _fetch(self, key: Tuple, cacheable: bool, priority: int, tamagotchi_state, action: str,
+                     user_message: Optional[str], action_result: Optional[dict]) -> str:
+        namespace, prompt = key
+        if cacheable and self.disk_cache is not None:
+            response = await asyncio.to_thread(self.disk_cache.get, namespace, prompt)
+            if response is not None:
+                self.cache.put(key, response)
+                return response
+        
+        if self.batcher is not None and cacheable:
+            # The batcher does its own admission, once per batch
+            started = time.perf_counter()
+            cancellable = (lambda: key in self._prefetching) if priority == PRIORITY["prefetch"] else None
+            response = await self.batcher.get_response(
+                tamagotchi_state, action, user_message, action_result, priority, cancellable
+            )
+            self.latency.record(priority, time.perf_counter() - started)
+        else:
+            response = await self._call_hedged(priority, lambda first: self._call(
+                key if first else None, priority, tamagotchi_state, action, user_message, action_result
+            ))
+        if cacheable:
+            self.cache.put(key, response)
+            if self.disk_cache is not None:
+                await asyncio.to_thread(self.disk_cache.put, namespace, prompt, response)
+        return response
+    
+    async def _call_hedged(self, priority: int, call: Callable[[bool], Awaitable[str]]) -> str:
+        """Run call(True), adding a backup call(False) if the first runs past the class's p95.
+        
+        Also hedges the batcher's single requests, so hedging doesn't stop
+        when batching is on.
+        """
+        first = asyncio.ensure_future(call(True))
+        hedge_delay = self.latency.percentile(priority, 0.95, self.hedge_min_samples) if self.hedge else None
+        if hedge_delay is None:
+            return await first
+        
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            # Don't hedge into a queue: a second request only helps if it can start now
+            if not done and (self.admission is None or self.admission.has_capacity()):
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(call(False)))
+            
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _call(self, key: Optional[Tuple], priority: int, tamagotchi_state, action: str,
+                    user_message: Optional[str], action_result: Optional[dict]) -> str:
+        preempt = self._preempter(key) if priority == PRIORITY["prefetch"] and key is not None else None
+        if self.admission is not None:
+            await self.admission.acquire(priority, key, preempt)
+        try:
+            started = time.perf_counter()
+            response = await self.llm_client.get_response(
+                tamagotchi_state,
+                action=action,
+                user_message=user_message,
+                action_result=action_result
+            )
+            self.latency.record(priority, time.perf_counter() - started)
+            return response
+        finally:
+            if self.admission is not None:
+                self.admission.release(preempt)
+    
+    def _preempter(self, key: Tuple):
+        """Cancels the prefetch for `key` to free its slot, unless a real caller has joined it."""
+        def preempt() -> bool:
+            future = self._prefetching.get(key)
+            if future is None:
+                return False
+            future.cancel()
+            return True
+        
+        return preempt
+    
+    async def stream_response(self, tamagotchi_state, action: str, user_message: Optional[str] = None,
+                              action_result: Optional[dict] = None):
+        """Yield the reply piece by piece.
+        
+        If nothing has arrived when the class deadline passes, or the call
+        fails before its first piece, the whole reply is fallback_response().
+        """
+        priority = priority_for(action)
+        deadline = self.deadlines.get(priority)
+        self.responses += 1
+        started = time.perf_counter()
+        pieces = self._stream(priority, tamagotchi_state, action, user_message, action_result)
+        try:
+            try:
+                first = await asyncio.wait_for(anext(pieces), deadline or None)
+            except (TimeoutError, StopAsyncIteration):
+                first = None
+            except Exception as e:
+                print(f"Streaming reply failed before its first piece: {e}")
+                first = None
+            if first is None:
+                self.fallbacks += 1
+                yield fallback_response(tamagotchi_state, action)
+                return
+            
+            yield first
+            async for piece in pieces:
+                yield piece
+            self.latency.record(priority, time.perf_counter() - started)
+        finally:
+            await pieces.aclose()
+    
+    async def _stream(self, priority: int, tamagotchi_state, action: str, user_message: Optional[str],
+                      action_result: Optional[dict]):
+        if self.admission is not None:
+            await self.admission.acquire(priority)
+        try:
+            if self.streamer is not None:
+                pieces = self.streamer(build_talk_prompt(tamagotchi_state, action, user_message, action_result))
+            else:
+                pieces = stream_response(self.llm_client, tamagotchi_state, action, user_message, action_result)
+            try:
+                async for piece in pieces:
+                    if piece:
+                        yield piece
+            finally:
+                await pieces.aclose()
+        finally:
+            if self.admission is not None:
+                self.admission.release()
+    
+    async def test_connection(self) -> bool:
+        return await self.llm_client.test_connection()
+    
+    def clear_cache(self, pet_id: Optional[str] = None):
+        """Forget cached replies for one pet, or for every pet if pet_id is None."""
+        self.cancel_prefetches()
+        if pet_id is None:
+            self._prefetched_keys.clear()
+            self.cache.clear()
+            if self.disk_cache is not None:
+                self.disk_cache.clear()
+        else:
+            self._prefetched_keys = {k: v for k, v in self._prefetched_keys.items() if k[0] != pet_id}
+            self.cache.clear_namespace(pet_id)
+            if self.disk_cache is not None:
+                self.disk_cache.clear_namespace(pet_id)
+        # The client's own cache has no notion of pets
+        self.llm_client.clear_cache()
+    
+    def get_cache_stats(self) -> dict:
+        return {
+            **self.llm_client.get_cache_stats(),
+            **self.cache.stats(),
+            **(self.disk_cache.stats() if self.disk_cache is not None else {}),
+            **(self.batcher.stats() if self.batcher is not None else {}),
+            **(self.bank.stats() if self.bank is not None else {}),
+            "coalesced_calls": self.coalesced_calls,
+            "in_flight": len(self._in_flight),
+            "prefetches": self.prefetches,
+            "prefetch_hits": self.prefetch_hits,
+            "prefetches_cancelled": self.prefetches_cancelled,
+            "responses": self.responses,
+            "fallbacks": self.fallbacks,
+            "fallback_rate": self.fallbacks / self.responses if self.responses else 0.0,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency": self.latency.stats()
+        }
+    
+    async def stop(self):
+        """Let batched calls in flight finish, so their replies still reach the caches."""
+        if self.batcher is not None:
+            await self.batcher.stop()
+    
+    def close(self):
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+        if self.bank is not None:
+            self.bank.close()
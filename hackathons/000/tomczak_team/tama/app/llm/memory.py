@@ -0,0 +1,211 @@
+import asyncio
+import inspect
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from app.llm.admission import PRIORITY, AdmissionController
+from app.llm.budget import is_fallback
+from app.llm.prompt import StablePrompt, count_tokens
+
+
+Turn = Tuple[str, str]
+Summarize = Callable[[str, List[Turn]], Awaitable[str]]
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You keep the running memory of a conversation between a Tamagotchi pet and its owner. "
+    "You get the current summary and some older exchanges that no longer fit in the pet's "
+    "context. Reply with only an updated summary of at most 80 words that keeps names, "
+    "promises, preferences and anything the owner may refer back to."
+)
+
+SUMMARY_PROMPT = StablePrompt(SUMMARY_SYSTEM_PROMPT)
+
+
+def render_turns(turns: List[Turn]) -> str:
+    return "\n".join(f"Owner: {user_message}\nYou: {reply}" for user_message, reply in turns)
+
+
+def clip_tokens(text: str, budget: int) -> str:
+    """The tail of `text` that fits in `budget` tokens, cut at a word boundary."""
+    words = text.split()
+    while words and count_tokens(" ".join(words)) > budget:
+        words = words[max(1, len(words) // 8):]
+    return " ".join(words)
+
+
+def fold_turns(summary: str, turns: List[Turn]) -> str:
+    """Summary without a model: what the owner said, appended to the old summary."""
+    said = " ".join(f'Owner said "{user_message}".' for user_message, _ in turns)
+    return f"{summary} {said}".strip()
+
+
+def chat_completion_summarizer(chat_client, model: str, prompt: StablePrompt = SUMMARY_PROMPT) -> Optional[Summarize]:
+    """A Summarize over an OpenAI chat client (sync or async), or None without one."""
+    if chat_client is None or not model:
+        return None
+    create = chat_client.chat.completions.create
+    
+    async def summarize(summary: str, turns: List[Turn]) -> str:
+        request = f"Current summary: {summary or '(none)'}\n\nOlder exchanges:\n{render_turns(turns)}"
+        kwargs = dict(model=model, messages=prompt.messages(request))
+        if inspect.iscoroutinefunction(create):
+            completion = await create(**kwargs)
+        else:
+            completion = await asyncio.to_thread(create, **kwargs)
+        prompt.record_usage(getattr(completion, "usage", None))
+        return (completion.choices[0].message.content or "").strip()
+    
+    return summarize
+
+
+class _Conversation:
+    def __init__(self):
+        self.turns: Deque[Tuple[str, str, int]] = deque()
+        self.turn_tokens = 0
+        self.summary = ""
+        self.evicted: List[Turn] = []
+        self.summarizing = False
+
+
+class ConversationMemory:
+    """Recent talk turns per pet, kept within a token budget.
+    
+    context() renders a rolling summary followed by the most recent turns and
+    never waits on the model. Turns pushed out of the budget are folded into
+    the summary by a background task (one per pet at a time) after the reply
+    has been sent; without a summarizer, or if it fails, they are folded in
+    locally instead. The summary itself is clipped to `summary_budget`.
+    
+    Fallback template replies aren't remembered: the pet never really said
+    them, and they'd crowd real turns out of the budget. Neither are turns
+    without an owner message. At most `max_conversations` pets are
+    remembered; the one that talked least recently is forgotten first.
+    """
+    
+    def __init__(self, summarize: Optional[Summarize] = None, token_budget: int = 600, summary_budget: int = 200,
+                 admission: Optional[AdmissionController] = None, max_conversations: int = 1024):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.admission = admission
+        self.max_conversations = max_conversations
+        self.skipped_fallbacks = 0
+        self.summaries = 0
+        self.summary_failures = 0
+        self.forgotten = 0
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def context(self, pet_id: str) -> Optional[str]:
+        """The conversation so far, ready to go into the talk prompt, or None before the first turn."""
+        conversation = self._conversations.get(pet_id)
+        if conversation is None:
+            return None
+        parts = []
+        if conversation.summary:
+            parts.append(f"Earlier: {conversation.summary}")
+        if conversation.turns:
+            parts.append(render_turns([(user_message, reply) for user_message, reply, _ in conversation.turns]))
+        return "\n".join(parts) or None
+    
+    def talk_result(self, pet_id: str, action_context: Optional[str] = None) -> Optional[dict]:
+        """The action_result for a talk request: its action context plus the conversation so far.
+        
+        build_talk_prompt() puts the "conversation" entry in the prompt. A
+        client that builds its own prompt from action_result (the lib's
+        TamagotchiLLMClient behind the non-streaming talk route) only sees
+        the history if it reads that entry.
+        """
+        result = {}
+        if action_context:
+            result["action_context"] = action_context
+        conversation = self.context(pet_id)
+        if conversation:
+            result["conversation"] = conversation
+        return result or None
+    
+    def add_turn(self, pet_id: str, user_message: Optional[str], reply: str):
+        if not user_message or not reply:
+            return
+        if is_fallback(reply):
+            self.skipped_fallbacks += 1
+            return
+        conversation = self._conversations.get(pet_id)
+        if conversation is None:
+            conversation = self._conversations[pet_id] = _Conversation()
+            while len(self._conversations) > max(1, self.max_conversations):
+                self._conversations.popitem(last=False)
+                self.forgotten += 1
+        else:
+            self._conversations.move_to_end(pet_id)
+        tokens = count_tokens(render_turns([(user_message, reply)]))
+        conversation.turns.append((user_message, reply, tokens))
+        conversation.turn_tokens += tokens
+        # Always keep the newest turn, even if it alone is over budget
+        while conversation.turn_tokens > self.token_budget and len(conversation.turns) > 1:
+            old_message, old_reply, old_tokens = conversation.turns.popleft()
+            conversation.turn_tokens -= old_tokens
+            conversation.evicted.append((old_message, old_reply))
+        
+        if conversation.evicted and not conversation.summarizing:
+            conversation.summarizing = True
+            task = asyncio.create_task(self._summarize(pet_id, conversation))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    def clear(self, pet_id: Optional[str] = None):
+        if pet_id is None:
+            self._conversations.clear()
+        else:
+            self._conversations.pop(pet_id, None)
+    
+    def stats(self) -> dict:
+        conversations = self._conversations.values()
+        return {
+            "conversations": len(self._conversations),
+            "forgotten_conversations": self.forgotten,
+            "turns": sum(len(conversation.turns) for conversation in conversations),
+            "max_context_tokens": max(
+                (count_tokens(self.context(pet_id) or "") for pet_id in self._conversations), default=0
+            ),
+            "token_budget": self.token_budget,
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+            "skipped_fallbacks": self.skipped_fallbacks,
+            "pending_summaries": len(self._tasks)
+        }
+    
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    async def _summarize(self, pet_id: str, conversation: _Conversation):
+        try:
+            while conversation.evicted:
+                turns, conversation.evicted = conversation.evicted, []
+                summary = await self._fold(conversation.summary, turns)
+                # A reset while the model was answering started a new conversation
+                if self._conversations.get(pet_id) is not conversation:
+                    return
+                conversation.summary = clip_tokens(summary, self.summary_budget)
+                self.summaries += 1
+        finally:
+            conversation.summarizing = False
+    
+    async def _fold(self, summary: str, turns: List[Turn]) -> str:
+        if self.summarize is not None:
+            try:
+                if self.admission is not None:
+                    await self.admission.acquire(PRIORITY["prefetch"])
+                try:
+                    folded = await self.summarize(summary, turns)
+                finally:
+                    if self.admission is not None:
+                        self.admission.release()
+                if folded:
+                    return folded
+            except Exception as e:
+                print(f"Conversation summary failed, folding turns locally: {e}")
+            self.summary_failures += 1
+        return fold_turns(summary, turns)
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import List
+
+from app.models.tamagotchi import ActionResult
+from app.registry import DEFAULT_PET_ID
+
+
+def likely_actions(tamagotchi_state) -> List[str]:
+    """Actions the player is most likely to take next, most likely first."""
+    if not tamagotchi_state.is_alive:
+        return ["revive"]
+    needs = {
+        "feed": tamagotchi_state.hunger,
+        "sleep": 100 - tamagotchi_state.energy,
+        "play": 100 - tamagotchi_state.happiness,
+        # Petting is the low-effort option, so it ranks just behind playing
+        "pet": 95 - tamagotchi_state.happiness
+    }
+    return sorted(needs, key=needs.get, reverse=True)
+
+
+class Prefetcher:
+    """Warms the LLM cache for a pet's most likely next actions after each state change.
+    
+    Spends at most `tokens_per_minute` (estimated at `tokens_per_call` per
+    prefetch) so idle-time generation can't run up the bill. A real request
+    that needs a slot held by a prefetch preempts it (see LLMGateway).
+    """
+    
+    def __init__(self, gateway, actions_per_state: int = 2, tokens_per_minute: int = 5000,
+                 tokens_per_call: int = 150):
+        self.gateway = gateway
+        self.actions_per_state = actions_per_state
+        self.tokens_per_minute = tokens_per_minute
+        self.tokens_per_call = tokens_per_call
+        self.skipped_for_budget = 0
+        self._window_start = time.monotonic()
+        self._tokens_spent = 0
+    
+    def on_state_change(self, tamagotchi_state, pet_id: str = DEFAULT_PET_ID):
+        """Prefetch replies for the likely next actions, from the next turn of the event loop.
+        
+        Deferring lets a reply the caller has just started (e.g. commentary)
+        claim its request first, so prefetches queue behind it.
+        """
+        if tamagotchi_state is None or self.tokens_per_minute <= 0:
+            return
+        # Prefetch against a copy; the live state keeps changing underneath
+        asyncio.get_running_loop().call_soon(self.prefetch_now, tamagotchi_state.model_copy(), pet_id)
+    
+    def prefetch_now(self, state, pet_id: str = DEFAULT_PET_ID) -> int:
+        """Prefetch replies for the likely next actions; returns how many were started."""
+        # Keyed like the real request, whose action_result is a dumped ActionResult
+        action_result = ActionResult(success=True, message="").model_dump()
+        started = 0
+        for action in likely_actions(state)[:self.actions_per_state]:
+            if not self._reserve_tokens():
+                self.skipped_for_budget += 1
+                break
+            if self.gateway.prefetch(state, action, pet_id, action_result):
+                started += 1
+            else:
+                self._tokens_spent -= self.tokens_per_call
+        return started
+    
+    def stats(self) -> dict:
+        return {
+            "prefetch_tokens_spent": self._tokens_spent,
+            "prefetch_tokens_per_minute": self.tokens_per_minute,
+            "prefetch_skipped_for_budget": self.skipped_for_budget
+        }
+    
+    def _reserve_tokens(self) -> bool:
+        now = time.monotonic()
+        if now - self._window_start >= 60:
+            self._window_start = now
+            self._tokens_spent = 0
+        if self._tokens_spent + self.tokens_per_call > self.tokens_per_minute:
+            return False
+        self._tokens_spent += self.tokens_per_call
+        return True
@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.models.tamagotchi import MOOD_EMOJIS, NEGLECT_LEVEL_MINUTES, TamagotchiState
+
+
+BANK_ACTIONS = ("feed", "play", "sleep", "pet", "revive", "create")
+NEGLECT_LEVELS = len(NEGLECT_LEVEL_MINUTES) + 1
+MAGIC = b"TAMABNK1"
+
+# Stats that make get_mood_emoji() return each mood
+MOOD_STATS = {
+    "💀": dict(is_alive=False),
+    "😵": dict(hunger=95),
+    "😴": dict(hunger=50, energy=5),
+    "😢": dict(hunger=50, energy=50, happiness=5),
+    "😊": dict(hunger=30, energy=90, happiness=90),
+    "🙂": dict(hunger=50, energy=50, happiness=65),
+    "😐": dict(hunger=50, energy=50, happiness=45),
+    "😔": dict(hunger=50, energy=50, happiness=20),
+}
+
+Combo = Tuple[str, str, int]
+
+
+def sample_state(mood: str, neglect_level: int) -> TamagotchiState:
+    """A pet in `mood` whose last care was long enough ago for `neglect_level`."""
+    minutes = NEGLECT_LEVEL_MINUTES[neglect_level - 1] + 1 if neglect_level else 0
+    cared_at = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    state = TamagotchiState(last_fed=cared_at, last_played=cared_at, last_pet=cared_at, **MOOD_STATS[mood])
+    state.update_mood()
+    return state
+
+
+class ResponseBank:
+    """Pre-generated commentary lines, memory-mapped and indexed by (action, mood, neglect level).
+    
+    File layout: MAGIC, a length-prefixed JSON header, a slot table of
+    (first line, line count) per combination, a line table of (offset,
+    length) into the UTF-8 text that follows. A lookup is two struct
+    reads and a slice of the map.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a response bank")
+        header_size, = struct.unpack_from("<I", self._map, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._map[header_start:header_start + header_size])
+        self.actions = {action: i for i, action in enumerate(header["actions"])}
+        self.moods = {mood: i for i, mood in enumerate(header["moods"])}
+        self.levels = header["levels"]
+        self.line_count = header["lines"]
+        self._slots = header_start + header_size
+        self._lines = self._slots + 8 * len(self.actions) * len(self.moods) * self.levels
+        self._text = self._lines + 8 * self.line_count
+    
+    def lookup(self, action: str, mood: str, neglect_level: int) -> Optional[str]:
+        first, count = self._slot(action, mood, neglect_level)
+        if not count:
+            self.misses += 1
+            return None
+        offset, length = struct.unpack_from("<II", self._map, self._lines + 8 * (first + random.randrange(count)))
+        self.hits += 1
+        return self._map[self._text + offset:self._text + offset + length].decode()
+    
+    def lookup_state(self, tamagotchi_state, action: str) -> Optional[str]:
+        return self.lookup(action, tamagotchi_state.current_mood, tamagotchi_state.get_neglect_level())
+    
+    def covers_state(self, tamagotchi_state, action: str) -> bool:
+        """Whether lookup_state() would find a line; doesn't count as a lookup."""
+        return self._slot(action, tamagotchi_state.current_mood, tamagotchi_state.get_neglect_level())[1] > 0
+    
+    def _slot(self, action: str, mood: str, neglect_level: int) -> Tuple[int, int]:
+        """(first line, line count) for a combination; a count of 0 if the bank has none."""
+        action_index = self.actions.get(action)
+        mood_index = self.moods.get(mood)
+        if action_index is None or mood_index is None or not 0 <= neglect_level < self.levels:
+            return 0, 0
+        slot = (action_index * len(self.moods) + mood_index) * self.levels + neglect_level
+        return struct.unpack_from("<II", self._map, self._slots + 8 * slot)
+    
+    def stats(self) -> dict:
+        return {
+            "bank_lines": self.line_count,
+            "bank_hits": self.hits,
+            "bank_misses": self.misses
+        }
+    
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def write_bank(path: str, lines: Dict[Combo, List[str]]):
+    """Write lines per (action, mood, neglect level) in the ResponseBank format."""
+    header = {"actions": list(BANK_ACTIONS), "moods": list(MOOD_EMOJIS), "levels": NEGLECT_LEVELS}
+    slots, line_table, text = [], [], bytearray()
+    for action in BANK_ACTIONS:
+        for mood in MOOD_EMOJIS:
+            for level in range(NEGLECT_LEVELS):
+                combo_lines = lines.get((action, mood, level), [])
+                slots.append((len(line_table), len(combo_lines)))
+                for line in combo_lines:
+                    encoded = line.encode()
+                    line_table.append((len(text), len(encoded)))
+                    text += encoded
+    header["lines"] = len(line_table)
+    encoded_header = json.dumps(header, ensure_ascii=False).encode()
+    
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(encoded_header)) + encoded_header)
+        f.write(b"".join(struct.pack("<II", *slot) for slot in slots))
+        f.write(b"".join(struct.pack("<II", *entry) for entry in line_table))
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+async def generate_bank(llm_client, per_combo: int, concurrency: int,
+                        actions=BANK_ACTIONS) -> Dict[Combo, List[str]]:
+    """Ask the LLM for `per_combo` distinct lines per combination, `concurrency` calls at a time.
+    
+    A combination is the state an action is taken in, which is what the
+    gateway looks the bank up by. As in a live request, the LLM is shown
+    the pet after the game has applied the action, and the action's result.
+    Combinations where the game refuses the action get no lines.
+    """
+    with tempfile.TemporaryDirectory() as save_dir:
+        return await _generate_bank(llm_client, per_combo, concurrency, actions, save_dir)
+
+
+async def _generate_bank(llm_client, per_combo: int, concurrency: int, actions, save_dir: str) -> Dict[Combo, List[str]]:
+    from app.registry import PetRegistry
+    
+    # A throwaway pet that applies each action exactly as the game does
+    engine = await PetRegistry(save_dir=save_dir).create("bank", "Tama")
+    engine_lock = asyncio.Lock()
+    semaphore = asyncio.Semaphore(concurrency)
+    lines: Dict[Combo, List[str]] = {}
+    clear_cache = getattr(llm_client, "clear_cache", None)
+    
+    async def apply_action(before: TamagotchiState, action: str):
+        async with engine_lock:
+            engine.tamagotchi = before.model_copy()
+            result = await getattr(engine, action)()
+            return engine.tamagotchi.model_copy(), result
+    
+    async def fill(combo: Combo):
+        action, mood, level = combo
+        before = sample_state(mood, level)
+        if action == "create":
+            state, action_result = before, None
+        else:
+            state, result = await apply_action(before, action)
+            if not result.success:
+                lines[combo] = []
+                return
+            action_result = result.model_dump()
+        seen = set()
+        # Allow some duplicate replies before giving up on a combination
+        for _ in range(per_combo * 2):
+            if len(seen) >= per_combo:
+                break
+            async with semaphore:
+                # The client caches replies by prompt; each call here should be a fresh completion
+                if clear_cache is not None:
+                    clear_cache()
+                try:
+                    reply = await llm_client.get_response(state, action=action, action_result=action_result)
+                except Exception as e:
+                    print(f"Failed to generate {combo}: {e}")
+                    continue
+            if reply and reply.strip():
+                seen.add(reply.strip())
+        lines[combo] = sorted(seen)
+    
+    combos = [(a, m, n) for a in actions for m in MOOD_EMOJIS for n in range(NEGLECT_LEVELS)]
+    await asyncio.gather(*[fill(combo) for combo in combos])
+    return lines
+
+
+async def build(args):
+    from lib.llm_client import TamagotchiLLMClient
+    
+    llm_client = TamagotchiLLMClient()
+    if not await llm_client.test_connection():
+        print("LLM connection failed; the bank would only contain fallback replies")
+        return
+    
+    lines = await generate_bank(llm_client, args.per_combo, args.concurrency)
+    write_bank(args.out, lines)
+    total = sum(len(combo_lines) for combo_lines in lines.values())
+    print(f"Wrote {total} lines for {len(lines)} combinations to {args.out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate the mood x action x neglect response bank.")
+    parser.add_argument("--out", default=os.getenv("LLM_RESPONSE_BANK", "response_bank.bin"))
+    parser.add_argument("--per-combo", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(build(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import asyncio
+import inspect
+from typing import AsyncIterator, Callable, Optional
+
+from app.llm.prompt import PET_LEGEND, PET_VOICE, StablePrompt, describe_pet
+
+
+StreamReply = Callable[[str], AsyncIterator[str]]
+
+# Fixed part of the talk prompt; build_talk_prompt() produces the per-call suffix
+TALK_SYSTEM_PROMPT = (
+    "You are a Tamagotchi pet talking with your owner. You get your current state, what "
+    "you and your owner said so far and your owner's new message. Answer in character with "
+    "dark humor that fits your mood and stats.\n"
+    "\n"
+    + PET_LEGEND +
+    "A dead pet speaks from beyond the grave.\n"
+    "\n"
+    + PET_VOICE +
+    "\n"
+    "Keep the reply under 50 words, never mention being an AI and never break character."
+)
+
+TALK_PROMPT = StablePrompt(TALK_SYSTEM_PROMPT)
+
+
+def build_talk_prompt(tamagotchi_state, action: str, user_message: Optional[str] = None,
+                      action_result: Optional[dict] = None) -> str:
+    result = action_result or {}
+    lines = [f"You: {describe_pet(tamagotchi_state)}"]
+    if result.get("conversation"):
+        lines.append(f"Conversation so far:\n{result['conversation']}")
+    if result.get("action_context"):
+        lines.append(f"Context: {result['action_context']}")
+    if action != "talk":
+        lines.append(f"Action: {action}")
+    lines.append(f"Owner: {user_message}" if user_message else "Owner says nothing.")
+    return "\n".join(lines)
+
+
+def chat_completion_streamer(chat_client, model: str, prompt: StablePrompt = TALK_PROMPT) -> Optional[StreamReply]:
+    """A StreamReply over an OpenAI chat client (sync or async), or None without one."""
+    if chat_client is None or not model:
+        return None
+    create = chat_client.chat.completions.create
+    
+    async def stream_reply(talk_prompt: str) -> AsyncIterator[str]:
+        kwargs = dict(model=model, messages=prompt.messages(talk_prompt), stream=True)
+        if inspect.iscoroutinefunction(create):
+            stream = await create(**kwargs)
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+            return
+        
+        # A sync client's stream blocks on every chunk, so each one is read in a thread
+        stream = await asyncio.to_thread(create, **kwargs)
+        chunks = iter(stream)
+        try:
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+    
+    return stream_reply
+
+
+async def stream_response(llm_client, tamagotchi_state, action: str, user_message: Optional[str] = None,
+                          action_result: Optional[dict] = None) -> AsyncIterator[str]:
+    """Yield the pet's reply piece by piece as the model produces it.
+    
+    Uses the client's stream_response() when it has one; a client that can
+    only return finished replies yields the whole reply as a single piece.
+    """
+    stream = getattr(llm_client, "stream_response", None)
+    if stream is None:
+        yield await llm_client.get_response(
+            tamagotchi_state,
+            action=action,
+            user_message=user_message,
+            action_result=action_result
+        )
+        return
+    
+    async for chunk in stream(
+        tamagotchi_state,
+        action=action,
+        user_message=user_message,
+        action_result=action_result
+    ):
+        if chunk:
+            yield chunk
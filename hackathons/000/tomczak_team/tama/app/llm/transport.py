@@ -0,0 +1,131 @@
+import asyncio
+import inspect
+import os
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # Optional; without it the pool speaks HTTP/1.1 only
+    h2 = None
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """An httpx transport with an explicit connection pool that reports its utilization."""
+    
+    def __init__(self, max_connections: int = 20, max_keepalive_connections: Optional[int] = None,
+                 keepalive_expiry: float = 60.0, http2: bool = False):
+        if http2 and h2 is None:
+            print("HTTP/2 requested but the h2 package isn't installed; using HTTP/1.1")
+            http2 = False
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections or max_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.prewarmed = 0
+        super().__init__(limits=self.limits, http2=http2)
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        # The connection stays busy until the body has been read and closed
+        response.stream = _ClosingResponseStream(response.stream, self._request_done)
+        return response
+    
+    def _request_done(self):
+        self.in_flight -= 1
+    
+    def stats(self) -> dict:
+        connections = getattr(self._pool, "connections", [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "max_connections": self.limits.max_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "http2": self.http2,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "utilization": round((len(connections) - idle) / self.limits.max_connections, 3),
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "prewarmed": self.prewarmed
+        }
+
+
+class _ClosingResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+    
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+    
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+
+def build_http_client(transport: PooledTransport, timeout: float = 30.0) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+async def prewarm(http_client: httpx.AsyncClient, url: str, connections: int) -> int:
+    """Open up to `connections` pooled connections to `url` ahead of the first real call.
+    
+    Any HTTP response means the connection (and its TLS session) is set up
+    and back in the pool; only connection failures count as not warmed.
+    """
+    async def touch() -> bool:
+        try:
+            await http_client.head(url)
+        except httpx.HTTPError:
+            return False
+        return True
+    
+    return sum(await asyncio.gather(*[touch() for _ in range(connections)]))
+
+
+def azure_chat_client(http_client: httpx.AsyncClient):
+    """An async Azure OpenAI client on the pooled HTTP client, or None without credentials."""
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    if not api_key or not endpoint:
+        return None
+    from openai import AsyncAzureOpenAI
+    
+    return AsyncAzureOpenAI(
+        api_key=api_key,
+        azure_endpoint=endpoint,
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01"),
+        http_client=http_client
+    )
+
+
+def pooled_client(chat_client, http_client: httpx.AsyncClient):
+    """The same async OpenAI client, rebound to the pooled HTTP client; None if it can't be.
+    
+    Only async clients can be rebound: a sync one needs a sync httpx.Client,
+    which this pool isn't.
+    """
+    if chat_client is None or not hasattr(chat_client, "with_options"):
+        return None
+    if not inspect.iscoroutinefunction(chat_client.chat.completions.create):
+        return None
+    return chat_client.with_options(http_client=http_client)
@@ -2,15 +2,31 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, WebSocket
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
+import json
 import os
 
 from lib.game_logic import GameEngine
 from lib.llm_client import TamagotchiLLMClient
 from app.models.tamagotchi import TalkRequest
 from app.api.websocket import ConnectionManager, WebSocketHandler
+from app.api.bridge import UnixSocketBridge
+from app.llm.commentary import CommentaryTracker
+from app.llm.admission import AdmissionController
+from app.llm.batching import BATCH_PROMPT, CommentaryBatcher, chat_completion_sender
+from app.llm.cache import ResponseCache
+from app.llm.disk_cache import DiskResponseCache
+from app.llm.response_bank import ResponseBank
+from app.llm.gateway import LLMGateway
+from app.llm.memory import ConversationMemory, chat_completion_summarizer
+from app.llm.prefetch import Prefetcher
+from app.llm.streaming import TALK_PROMPT, chat_completion_streamer, stream_response
+from app.llm.transport import PooledTransport, azure_chat_client, build_http_client, pooled_client, prewarm
+from app.registry import PetRegistry, DEFAULT_PET_ID
+from app.decay import DecayRates
+from app.scheduler import DeadlineScheduler
 
 
 class CreateTamagotchiRequest(BaseModel):
@@ -25,45 +41,180 @@ class TalkResponse(BaseModel):
 
 # Global instances
 game_engine: GameEngine
-llm_client: TamagotchiLLMClient
+pet_registry: PetRegistry
+llm_client: LLMGateway
 connection_manager: ConnectionManager
 websocket_handler: WebSocketHandler
+deadline_scheduler: DeadlineScheduler
+commentary: CommentaryTracker
+prefetcher: Prefetcher
+memory: Optional[ConversationMemory] = None
+http_transport: Optional[PooledTransport] = None
+
+
+async def on_pet_deadline(pet_id: str):
+    """A pet crossed a threshold: push its fresh state and arm the next deadline."""
+    engine = pet_registry.get(pet_id)
+    state = await engine.get_state() if engine else None
+    if not state:
+        return
+    deadline_scheduler.schedule(pet_id, pet_registry.next_deadline(pet_id, state))
+    await connection_manager.broadcast_state_update(state, pet_id)
+    prefetcher.on_state_change(state, pet_id)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
-    global game_engine, llm_client, connection_manager, websocket_handler
+    global game_engine, pet_registry, llm_client, connection_manager, websocket_handler, deadline_scheduler
+    global commentary, prefetcher, memory, http_transport
     
     # Initialize game engine and LLM client
     game_engine = GameEngine()
-    llm_client = TamagotchiLLMClient()
+    pet_registry = PetRegistry(
+        save_dir=os.getenv("PET_SAVE_DIR", "pets"),
+        hot_limit=int(os.getenv("PET_HOT_STATES", "256")),
+        owned_prefixes=[prefix for prefix in os.getenv("PET_OWNED_PREFIXES", "").split(",") if prefix]
+    )
+    # Behind a bridge, only the process that owns the default pet runs it
+    owns_default_pet = pet_registry.owns(DEFAULT_PET_ID)
+    if owns_default_pet:
+        pet_registry.register(DEFAULT_PET_ID, game_engine)
+    disk_cache_path = os.getenv("LLM_DISK_CACHE_PATH", "llm_cache.sqlite3")
+    batch_window_ms = float(os.getenv("LLM_BATCH_WINDOW_MS", "50"))
+    bank_path = os.getenv("LLM_RESPONSE_BANK", "response_bank.bin")
+    base_client = TamagotchiLLMClient()
+    http_transport = PooledTransport(
+        max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60")),
+        http2=os.getenv("LLM_HTTP2", "false").lower() == "true"
+    )
+    http_client = build_http_client(http_transport)
+    # The base client's per-call requests share the pool too, when its client can be rebound
+    pooled_base_client = pooled_client(base_client.client, http_client)
+    if pooled_base_client is not None:
+        base_client.client = pooled_base_client
+    elif base_client.client is not None:
+        print("Base LLM client is synchronous; its calls don't use the connection pool")
+    # The app's own chat calls (batches, summaries, streamed talk) go through the pooled transport
+    pooled_chat_client = azure_chat_client(http_client)
+    chat_client = pooled_chat_client or base_client.client
+    admission = AdmissionController(
+        max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "4")),
+        requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "120")),
+        tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "60000")),
+        tokens_per_request=int(os.getenv("LLM_TOKENS_PER_REQUEST", "300"))
+    )
+    llm_client = LLMGateway(
+        base_client,
+        ResponseCache(
+            max_size=int(os.getenv("LLM_CACHE_SIZE", "100")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+        ),
+        DiskResponseCache(
+            disk_cache_path,
+            max_entries=int(os.getenv("LLM_DISK_CACHE_SIZE", "10000")),
+            ttl=float(os.getenv("LLM_DISK_CACHE_TTL", os.getenv("RESPONSE_CACHE_TTL", "300"))) or None
+        ) if disk_cache_path else None,
+        admission,
+        CommentaryBatcher(
+            base_client,
+            chat_completion_sender(chat_client, os.getenv("AZURE_OPENAI_MODEL", "")),
+            window=batch_window_ms / 1000,
+            admission=admission
+        ) if batch_window_ms > 0 else None,
+        deadlines={
+            "action": float(os.getenv("LLM_ACTION_DEADLINE_MS", "800")) / 1000,
+            "create": float(os.getenv("LLM_CREATE_DEADLINE_MS", "3000")) / 1000,
+            "talk": float(os.getenv("LLM_TALK_DEADLINE_MS", "8000")) / 1000
+        },
+        hedge=os.getenv("LLM_HEDGE", "true").lower() == "true",
+        bank=ResponseBank(bank_path) if bank_path and os.path.exists(bank_path) else None,
+        streamer=chat_completion_streamer(chat_client, os.getenv("AZURE_OPENAI_MODEL", ""))
+    )
+    if llm_client.bank is not None:
+        print(f"Loaded response bank with {llm_client.bank.line_count} lines")
+    print(f"Warmed LLM cache with {llm_client.warm()} saved responses")
+    prefetcher = Prefetcher(
+        llm_client,
+        actions_per_state=int(os.getenv("LLM_PREFETCH_ACTIONS", "2")),
+        tokens_per_minute=int(os.getenv("LLM_PREFETCH_TOKENS_PER_MINUTE", "5000")),
+        tokens_per_call=int(os.getenv("LLM_PREFETCH_TOKENS_PER_CALL", "150"))
+    )
+    memory = ConversationMemory(
+        chat_completion_summarizer(chat_client, os.getenv("AZURE_OPENAI_MODEL", "")),
+        token_budget=int(os.getenv("LLM_MEMORY_TOKENS", "600")),
+        summary_budget=int(os.getenv("LLM_MEMORY_SUMMARY_TOKENS", "200")),
+        admission=admission,
+        max_conversations=int(os.getenv("LLM_MEMORY_PETS", "1024"))
+    )
     
     # Initialize WebSocket components
-    connection_manager = ConnectionManager()
-    websocket_handler = WebSocketHandler(connection_manager, game_engine, llm_client)
+    # With several uvicorn workers, relay broadcasts through the broker socket
+    bridge_socket = os.getenv("BROADCAST_BRIDGE_SOCKET")
+    connection_manager = ConnectionManager(
+        max_queue_size=int(os.getenv("WS_SEND_QUEUE_SIZE", "100")),
+        slow_client_timeout=float(os.getenv("WS_SLOW_CLIENT_TIMEOUT", "5")),
+        bridge=UnixSocketBridge(bridge_socket) if bridge_socket else None,
+        owns=pet_registry.owns
+    )
+    await connection_manager.start_bridge()
+    deadline_scheduler = DeadlineScheduler(on_pet_deadline)
+    commentary = CommentaryTracker(llm_client, connection_manager)
+    websocket_handler = WebSocketHandler(
+        connection_manager, pet_registry, llm_client, deadline_scheduler, commentary, prefetcher, memory
+    )
     
     # Try to load existing save
-    existing_state = await game_engine.load_state()
+    existing_state = await game_engine.load_state() if owns_default_pet else None
     if existing_state:
         print(f"Loaded existing Tamagotchi: {existing_state.name}")
-    else:
+    elif owns_default_pet:
         # Create default Tamagotchi
         await game_engine.create_new_tamagotchi("Tama")
         print("Created new Tamagotchi: Tama")
     
-    # Start background updates
-    await game_engine.start_background_updates()
+    # Other pets come back from their own save files
+    loaded_pets = await pet_registry.load_saved()
+    if loaded_pets:
+        print(f"Loaded {loaded_pets} more pets")
+    
+    # Start background updates: the default pet's own loop, one shared tick for the rest
+    if owns_default_pet:
+        await game_engine.start_background_updates()
+    await pet_registry.start_ticking(
+        DecayRates.from_env(),
+        on_pet_deadline,
+        lazy=os.getenv("TAMAGOTCHI_LAZY_DECAY", "false").lower() == "true"
+    )
+    for pet_id, engine in pet_registry.items():
+        if engine.tamagotchi is not None:
+            deadline_scheduler.schedule(pet_id, pet_registry.next_deadline(pet_id, engine.tamagotchi))
+    await deadline_scheduler.start()
     
-    # Test LLM connection
+    # Test LLM connection and open pooled connections before the first real call
     llm_working = await llm_client.test_connection()
     print(f"LLM connection: {'✓' if llm_working else '✗ (using fallbacks)'}")
+    prewarm_connections = int(os.getenv("LLM_HTTP_PREWARM", "4"))
+    if pooled_chat_client is not None and prewarm_connections > 0:
+        http_transport.prewarmed = await prewarm(
+            http_client, os.getenv("AZURE_OPENAI_ENDPOINT"), prewarm_connections
+        )
+        print(f"Pre-opened {http_transport.prewarmed} LLM connections")
     
     yield
     
-    # Cleanup on shutdown
-    await game_engine.stop_background_updates()
-    await game_engine.save_state()
+    # Cleanup on shutdown (the default pet's engine is in the registry too)
+    await deadline_scheduler.stop()
+    await commentary.stop()
+    await memory.stop()
+    await connection_manager.stop_bridge()
+    await pet_registry.stop_all()
+    if owns_default_pet:
+        await game_engine.save_state()
+    await llm_client.stop()
+    llm_client.close()
+    await http_client.aclose()
 
 
 app = FastAPI(
@@ -111,33 +262,92 @@ async def health_check():
     return {
         "status": "healthy",
         "tamagotchi_exists": game_engine.tamagotchi is not None,
+        "pet_count": len(pet_registry),
         "llm_available": llm_client.client is not None,
         "websocket_connections": connection_manager.get_connection_count()
     }
 
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates."""
-    await websocket_handler.handle_websocket(websocket)
+@app.websocket("/ws/{pet_id}")
+async def websocket_endpoint(websocket: WebSocket, pet_id: str = DEFAULT_PET_ID):
+    """WebSocket endpoint for real-time updates of one pet (more via "subscribe")."""
+    await websocket_handler.handle_websocket(websocket, pet_id)
+
+
+def get_engine(pet_id: str) -> GameEngine:
+    """Resolve a pet ID to its game engine or raise 404."""
+    engine = pet_registry.get(pet_id)
+    if engine is None:
+        raise HTTPException(status_code=404, detail=f"No Tamagotchi found with id: {pet_id}")
+    return engine
+
+
+async def perform_action(pet_id: str, action: str, defer_commentary: bool = False):
+    """Run a game action on a pet and get the LLM's reaction to it.
+    
+    With defer_commentary the action's outcome is returned immediately as
+    202 Accepted with a commentary_id; the reaction is pushed to the pet's
+    WebSocket room and can be fetched from /api/tamagotchi/commentary/{id}.
+    """
+    engine = get_engine(pet_id)
+    # Replies are cached under the state the action was taken in
+    before_state = await engine.get_state()
+    before_state = before_state.model_copy() if before_state else None
+    result = await getattr(engine, action)()
+    state = await engine.get_state()
+    deadline_scheduler.schedule(pet_id, pet_registry.next_deadline(pet_id, state))
+    await connection_manager.broadcast_state_update(state, pet_id)
+    
+    outcome = {
+        "success": result.success,
+        "message": result.message,
+        "stat_changes": result.stat_changes,
+        "tamagotchi": state.to_dict()
+    }
+    if defer_commentary:
+        outcome["commentary_id"] = commentary.start(
+            pet_id, state, action, result.model_dump(), key_state=before_state
+        )
+        prefetcher.on_state_change(state, pet_id)
+        return JSONResponse(outcome, status_code=202)
+    
+    # Get response from LLM
+    outcome["response"] = await llm_client.get_response(
+        state,
+        action=action,
+        action_result=result.model_dump(),
+        pet_id=pet_id,
+        key_state=before_state
+    )
+    prefetcher.on_state_change(state, pet_id)
+    return outcome
 
 
 @app.post("/api/tamagotchi/create")
-async def create_tamagotchi(request: CreateTamagotchiRequest):
+@app.post("/api/tamagotchi/{pet_id}/create")
+async def create_tamagotchi(request: CreateTamagotchiRequest, pet_id: str = DEFAULT_PET_ID):
     """Create a new Tamagotchi with given name."""
+    if not pet_registry.owns(pet_id):
+        raise HTTPException(status_code=421, detail=f"Tamagotchi {pet_id} is served by another process")
     try:
-        tamagotchi = await game_engine.create_new_tamagotchi(request.name)
+        engine = await pet_registry.create(pet_id, request.name)
+        tamagotchi = await engine.get_state()
+        deadline_scheduler.schedule(pet_id, pet_registry.next_deadline(pet_id, tamagotchi))
         
         # Get welcome message from LLM
         welcome_response = await llm_client.get_response(
             tamagotchi,
             action="create",
-            user_message=f"I just named you {request.name}"
+            user_message=f"I just named you {request.name}",
+            pet_id=pet_id
         )
+        prefetcher.on_state_change(tamagotchi, pet_id)
         
         return {
             "success": True,
             "message": f"Created Tamagotchi: {request.name}",
+            "pet_id": pet_id,
             "tamagotchi": tamagotchi.to_dict(),
             "welcome_message": welcome_response
         }
@@ -146,162 +356,117 @@ async def create_tamagotchi(request: CreateTamagotchiRequest):
 
 
 @app.get("/api/tamagotchi/state")
-async def get_tamagotchi_state():
+@app.get("/api/tamagotchi/{pet_id}/state")
+async def get_tamagotchi_state(pet_id: str = DEFAULT_PET_ID):
     """Get current Tamagotchi state."""
     try:
-        state = await game_engine.get_state()
+        state = await get_engine(pet_id).get_state()
         if not state:
             raise HTTPException(status_code=404, detail="No Tamagotchi found")
         
-        return {
-            "success": True,
-            "tamagotchi": state.to_dict()
-        }
+        # Serve the cached snapshot as-is instead of re-encoding the state
+        return Response(
+            content=b'{"success":true,"tamagotchi":' + state.snapshot() + b'}',
+            media_type="application/json"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/tamagotchi/feed")
-async def feed_tamagotchi():
+@app.post("/api/tamagotchi/{pet_id}/feed")
+async def feed_tamagotchi(pet_id: str = DEFAULT_PET_ID, defer_commentary: bool = False):
     """Feed the Tamagotchi."""
     try:
-        result = await game_engine.feed()
-        state = await game_engine.get_state()
-        
-        # Get response from LLM
-        llm_response = await llm_client.get_response(
-            state,
-            action="feed",
-            action_result=result.model_dump()
-        )
-        
-        return {
-            "success": result.success,
-            "message": result.message,
-            "stat_changes": result.stat_changes,
-            "tamagotchi": state.to_dict(),
-            "response": llm_response
-        }
+        return await perform_action(pet_id, "feed", defer_commentary)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/tamagotchi/play")
-async def play_with_tamagotchi():
+@app.post("/api/tamagotchi/{pet_id}/play")
+async def play_with_tamagotchi(pet_id: str = DEFAULT_PET_ID, defer_commentary: bool = False):
     """Play with the Tamagotchi."""
     try:
-        result = await game_engine.play()
-        state = await game_engine.get_state()
-        
-        # Get response from LLM
-        llm_response = await llm_client.get_response(
-            state,
-            action="play",
-            action_result=result.model_dump()
-        )
-        
-        return {
-            "success": result.success,
-            "message": result.message,
-            "stat_changes": result.stat_changes,
-            "tamagotchi": state.to_dict(),
-            "response": llm_response
-        }
+        return await perform_action(pet_id, "play", defer_commentary)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/tamagotchi/sleep")
-async def sleep_tamagotchi():
+@app.post("/api/tamagotchi/{pet_id}/sleep")
+async def sleep_tamagotchi(pet_id: str = DEFAULT_PET_ID, defer_commentary: bool = False):
     """Put the Tamagotchi to sleep."""
     try:
-        result = await game_engine.sleep()
-        state = await game_engine.get_state()
-        
-        # Get response from LLM
-        llm_response = await llm_client.get_response(
-            state,
-            action="sleep",
-            action_result=result.model_dump()
-        )
-        
-        return {
-            "success": result.success,
-            "message": result.message,
-            "stat_changes": result.stat_changes,
-            "tamagotchi": state.to_dict(),
-            "response": llm_response
-        }
+        return await perform_action(pet_id, "sleep", defer_commentary)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/tamagotchi/pet")
-async def pet_tamagotchi():
+@app.post("/api/tamagotchi/{pet_id}/pet")
+async def pet_tamagotchi(pet_id: str = DEFAULT_PET_ID, defer_commentary: bool = False):
     """Pet the Tamagotchi."""
     try:
-        result = await game_engine.pet()
-        state = await game_engine.get_state()
-        
-        # Get response from LLM
-        llm_response = await llm_client.get_response(
-            state,
-            action="pet",
-            action_result=result.model_dump()
-        )
-        
-        return {
-            "success": result.success,
-            "message": result.message,
-            "stat_changes": result.stat_changes,
-            "tamagotchi": state.to_dict(),
-            "response": llm_response
-        }
+        return await perform_action(pet_id, "pet", defer_commentary)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/tamagotchi/revive")
-async def revive_tamagotchi():
+@app.post("/api/tamagotchi/{pet_id}/revive")
+async def revive_tamagotchi(pet_id: str = DEFAULT_PET_ID, defer_commentary: bool = False):
     """Revive a dead Tamagotchi."""
     try:
-        result = await game_engine.revive()
-        state = await game_engine.get_state()
-        
-        # Get response from LLM
-        llm_response = await llm_client.get_response(
-            state,
-            action="revive",
-            action_result=result.model_dump()
-        )
-        
-        return {
-            "success": result.success,
-            "message": result.message,
-            "stat_changes": result.stat_changes,
-            "tamagotchi": state.to_dict(),
-            "response": llm_response
-        }
+        return await perform_action(pet_id, "revive", defer_commentary)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/tamagotchi/commentary/{commentary_id}")
+async def get_commentary(commentary_id: str):
+    """Get the LLM commentary for an action started with defer_commentary."""
+    entry = commentary.get(commentary_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No commentary found with id: {commentary_id}")
+    return entry
+
+
 @app.post("/api/tamagotchi/reset")
-async def reset_tamagotchi_game():
+@app.post("/api/tamagotchi/{pet_id}/reset")
+async def reset_tamagotchi_game(pet_id: str = DEFAULT_PET_ID):
     """Reset the game completely - delete all progress and start fresh."""
     try:
-        # Clear LLM cache for fresh responses
-        llm_client.clear_cache()
+        engine = get_engine(pet_id)
+        
+        # Clear this pet's cached LLM responses and conversation for fresh ones
+        llm_client.clear_cache(pet_id)
+        memory.clear(pet_id)
         
         # Reset the game
-        fresh_state = await game_engine.reset_game()
+        fresh_state = await engine.reset_game()
+        deadline_scheduler.schedule(pet_id, pet_registry.next_deadline(pet_id, fresh_state))
         
         # Get welcome message for new game
         welcome_response = await llm_client.get_response(
             fresh_state,
             action="create",
-            user_message="Game has been reset - I'm starting fresh!"
+            user_message="Game has been reset - I'm starting fresh!",
+            pet_id=pet_id
         )
+        prefetcher.on_state_change(fresh_state, pet_id)
         
         return {
             "success": True,
@@ -309,40 +474,89 @@ async def reset_tamagotchi_game():
             "tamagotchi": fresh_state.to_dict(),
             "response": welcome_response
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/tamagotchi/talk", response_model=TalkResponse)
-async def talk_to_tamagotchi(request: TalkRequest):
+@app.post("/api/tamagotchi/{pet_id}/talk", response_model=TalkResponse)
+async def talk_to_tamagotchi(request: TalkRequest, pet_id: str = DEFAULT_PET_ID):
     """Talk to the Tamagotchi."""
     try:
-        state = await game_engine.get_state()
+        state = await get_engine(pet_id).get_state()
         if not state:
             raise HTTPException(status_code=404, detail="No Tamagotchi found")
         
-        # Get response from LLM
+        # Get response from LLM. Known gap: the history only reaches the model if the
+        # lib client puts action_result["conversation"] in its prompt; the streaming
+        # route builds its own prompt with build_talk_prompt() and always includes it.
         llm_response = await llm_client.get_response(
             state,
             action="talk",
             user_message=request.message,
-            action_result={'action_context': request.action_context} if request.action_context else None
+            action_result=memory.talk_result(pet_id, request.action_context),
+            pet_id=pet_id
         )
+        memory.add_turn(pet_id, request.message, llm_response)
         
         return TalkResponse(
             response=llm_response,
             mood=state.current_mood,
             timestamp=state.last_fed.isoformat()  # Use any recent timestamp
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/tamagotchi/talk/stream")
+@app.post("/api/tamagotchi/{pet_id}/talk/stream")
+async def stream_talk_to_tamagotchi(request: TalkRequest, pet_id: str = DEFAULT_PET_ID):
+    """Talk to the Tamagotchi, streaming the reply as Server-Sent Events."""
+    state = await get_engine(pet_id).get_state()
+    if not state:
+        raise HTTPException(status_code=404, detail="No Tamagotchi found")
+    
+    async def events():
+        chunks = []
+        try:
+            async for chunk in stream_response(
+                llm_client,
+                state,
+                action="talk",
+                user_message=request.message,
+                action_result=memory.talk_result(pet_id, request.action_context)
+            ):
+                chunks.append(chunk)
+                yield f"event: delta\ndata: {json.dumps({'text': chunk})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        
+        memory.add_turn(pet_id, request.message, "".join(chunks))
+        done = TalkResponse(
+            response="".join(chunks),
+            mood=state.current_mood,
+            timestamp=state.last_fed.isoformat()
+        )
+        yield f"event: done\ndata: {done.model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/stats")
-async def get_stats():
-    """Get application statistics."""
+@app.get("/api/tamagotchi/{pet_id}/stats")
+async def get_stats(pet_id: str = DEFAULT_PET_ID):
+    """Get application statistics, with the given pet's (default: the default pet's) own stats."""
     try:
-        state = await game_engine.get_state()
+        state = await get_engine(pet_id).get_state()
         cache_stats = llm_client.get_cache_stats()
         
         return {
@@ -354,10 +568,61 @@ async def get_stats():
                 "is_alive": state.is_alive if state else None
             },
             "system_stats": {
+                "pet_count": len(pet_registry),
+                "pending_deadlines": deadline_scheduler.pending_count(),
+                "pending_commentary": commentary.pending_count(),
                 "llm_cache_size": cache_stats["cache_size"],
+                "llm_cache": {
+                    "hits": cache_stats["hits"],
+                    "misses": cache_stats["misses"],
+                    "hit_rate": round(cache_stats["hit_rate"], 3),
+                    "evictions": cache_stats["evictions"],
+                    "expirations": cache_stats["expirations"],
+                    "memory_bytes": cache_stats["memory_bytes"]
+                },
+                "llm_disk_cache": {
+                    "size": cache_stats.get("disk_size", 0),
+                    "hits": cache_stats.get("disk_hits", 0),
+                    "misses": cache_stats.get("disk_misses", 0),
+                    "expirations": cache_stats.get("disk_expirations", 0)
+                },
+                "llm_coalesced_calls": cache_stats["coalesced_calls"],
+                "llm_latency": {
+                    "fallback_rate": round(cache_stats["fallback_rate"], 3),
+                    "fallbacks": cache_stats["fallbacks"],
+                    "hedges": cache_stats["hedges"],
+                    "hedge_wins": cache_stats["hedge_wins"],
+                    **cache_stats["latency"]
+                },
+                "llm_response_bank": {
+                    "lines": cache_stats.get("bank_lines", 0),
+                    "hits": cache_stats.get("bank_hits", 0),
+                    "misses": cache_stats.get("bank_misses", 0)
+                },
+                "llm_batching": {
+                    "batches": cache_stats.get("batches", 0),
+                    "batched_requests": cache_stats.get("batched_requests", 0),
+                    "fallbacks": cache_stats.get("batch_fallbacks", 0),
+                    "prompt": BATCH_PROMPT.stats()
+                },
+                "llm_streaming": {
+                    "enabled": llm_client.streamer is not None,
+                    "prompt": TALK_PROMPT.stats()
+                },
+                "llm_admission": llm_client.admission.stats(),
+                "llm_memory": memory.stats(),
+                "llm_http_pool": http_transport.stats(),
+                "llm_prefetch": {
+                    "started": cache_stats["prefetches"],
+                    "hits": cache_stats["prefetch_hits"],
+                    "cancelled": cache_stats["prefetches_cancelled"],
+                    **prefetcher.stats()
+                },
                 "llm_available": llm_client.client is not None
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,205 @@
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.models.tamagotchi import TamagotchiState, MOOD_EMOJIS, MOOD_CODES, NEGLECT_LEVEL_MINUTES
+
+
+NEGLECT_THRESHOLDS = np.array(NEGLECT_LEVEL_MINUTES, dtype=np.float64)
+
+
+class PetTable:
+    """Struct-of-arrays table of pet stats for batched updates.
+
+    Each pet is one row; every stat is a NumPy column, so decay, death
+    checks and mood/neglect classification run as one array pass for all
+    pets instead of one pydantic object at a time.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        # Bumped by every tick(), so readers can tell whether a row moved on
+        self.ticks = 0
+        self.row_of: Dict[str, int] = {}
+        self.pet_ids: List[str] = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.capacity = capacity
+        self.hunger = np.zeros(capacity, dtype=np.int16)
+        self.happiness = np.zeros(capacity, dtype=np.int16)
+        self.energy = np.zeros(capacity, dtype=np.int16)
+        self.is_alive = np.zeros(capacity, dtype=np.bool_)
+        self.mood = np.zeros(capacity, dtype=np.int8)
+        self.deaths = np.zeros(capacity, dtype=np.int32)
+        # Timestamps as POSIX seconds
+        self.last_fed = np.zeros(capacity, dtype=np.float64)
+        self.last_played = np.zeros(capacity, dtype=np.float64)
+        self.last_slept = np.zeros(capacity, dtype=np.float64)
+        self.last_pet = np.zeros(capacity, dtype=np.float64)
+        # When the row's stats were last brought up to date, for catch_up()
+        self.ticked_at = np.zeros(capacity, dtype=np.float64)
+
+    def _columns(self):
+        return (
+            "hunger", "happiness", "energy", "is_alive", "mood", "deaths",
+            "last_fed", "last_played", "last_slept", "last_pet", "ticked_at",
+        )
+
+    def _grow(self):
+        old = {name: getattr(self, name) for name in self._columns()}
+        self._allocate(self.capacity * 2)
+        for name, column in old.items():
+            getattr(self, name)[:len(column)] = column
+
+    def add(self, pet_id: str, state: TamagotchiState) -> int:
+        """Add a pet (or overwrite its row) and return its row index."""
+        row = self.row_of.get(pet_id)
+        if row is None:
+            if self.size == self.capacity:
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.row_of[pet_id] = row
+            self.pet_ids.append(pet_id)
+            self.ticked_at[row] = time.time()
+        self.write_row(row, state)
+        return row
+
+    def write_row(self, row: int, state: TamagotchiState):
+        """Copy a pet's state into the table."""
+        self.hunger[row] = state.hunger
+        self.happiness[row] = state.happiness
+        self.energy[row] = state.energy
+        self.is_alive[row] = state.is_alive
+        self.mood[row] = MOOD_CODES.get(state.current_mood, MOOD_CODES["😐"])
+        self.deaths[row] = state.deaths
+        self.last_fed[row] = state.last_fed.timestamp()
+        self.last_played[row] = state.last_played.timestamp()
+        self.last_slept[row] = state.last_slept.timestamp()
+        self.last_pet[row] = state.last_pet.timestamp()
+
+    def read_row(self, row: int, state: TamagotchiState):
+        """Copy the table's stats for a row back onto a pet's state."""
+        state.hunger = int(self.hunger[row])
+        state.happiness = int(self.happiness[row])
+        state.energy = int(self.energy[row])
+        state.is_alive = bool(self.is_alive[row])
+        state.current_mood = MOOD_EMOJIS[self.mood[row]]
+        state.deaths = int(self.deaths[row])
+
+    def decay(self, hunger_delta: int, happiness_delta: int, energy_delta: int):
+        """Apply one tick of stat changes to every living pet, clamped to 0-100."""
+        n = self.size
+        alive = self.is_alive[:n]
+        for column, delta in (
+            (self.hunger, hunger_delta),
+            (self.happiness, happiness_delta),
+            (self.energy, energy_delta),
+        ):
+            view = column[:n]
+            np.clip(view + delta * alive, 0, 100, out=view)
+
+    def should_die(self) -> np.ndarray:
+        """Vectorized TamagotchiState.should_die() for every row."""
+        n = self.size
+        return (self.hunger[:n] >= 100) | (self.happiness[:n] <= 0) | (self.energy[:n] <= 0)
+
+    def mood_codes(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vectorized TamagotchiState.get_mood_emoji(), as codes into MOOD_EMOJIS."""
+        index = slice(0, self.size) if rows is None else rows
+        hunger = self.hunger[index]
+        happiness = self.happiness[index]
+        energy = self.energy[index]
+        # Same precedence as get_mood_emoji(): first matching condition wins
+        conditions = [
+            ~self.is_alive[index],
+            hunger >= 90,
+            energy <= 10,
+            happiness <= 10,
+            (happiness >= 80) & (energy >= 70),
+            happiness >= 60,
+            happiness >= 40,
+        ]
+        choices = [MOOD_CODES[e] for e in ("💀", "😵", "😴", "😢", "😊", "🙂", "😐")]
+        return np.select(conditions, choices, default=MOOD_CODES["😔"]).astype(np.int8)
+
+    def neglect_levels(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Vectorized TamagotchiState.get_neglect_level() for every row."""
+        n = self.size
+        now_ts = (now or datetime.now(timezone.utc)).timestamp()
+        oldest = np.minimum(np.minimum(self.last_fed[:n], self.last_played[:n]), self.last_pet[:n])
+        minutes_since = (now_ts - oldest) / 60
+        return np.searchsorted(NEGLECT_THRESHOLDS, minutes_since, side="right").astype(np.int8)
+
+    def tick(self, hunger_delta: int, happiness_delta: int, energy_delta: int) -> np.ndarray:
+        """Decay all pets, kill those that should die and refresh moods.
+
+        Returns the row indices of pets that died during this tick.
+        """
+        n = self.size
+        self.decay(hunger_delta, happiness_delta, energy_delta)
+        newly_dead = np.flatnonzero(self.is_alive[:n] & self.should_die())
+        self.is_alive[newly_dead] = False
+        self.deaths[newly_dead] += 1
+        self.mood[:n] = self.mood_codes()
+        self.ticks += 1
+        return newly_dead
+
+    def advance(self, ticks: int, hunger_delta: int, happiness_delta: int, energy_delta: int,
+                rows: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Closed-form `ticks` calls of tick(), for all rows or just `rows`.
+
+        A stat moving by a constant delta and clamped to 0-100 ends up at
+        clip(value + k * delta) after k ticks, and a living pet dies on the
+        first tick any stat reaches its deadly bound, so both follow directly
+        from the current row. Returns the row indices of pets that died.
+        """
+        index = np.arange(self.size) if rows is None else np.asarray(rows, dtype=np.intp)
+        alive = self.is_alive[index]
+        never = np.iinfo(np.int64).max
+        death = np.full(len(index), never, dtype=np.int64)
+        # (column, distance to the deadly bound, step toward it per tick)
+        for column, delta, dies_at_top in (
+            (self.hunger, hunger_delta, True),
+            (self.happiness, happiness_delta, False),
+            (self.energy, energy_delta, False),
+        ):
+            values = column[index].astype(np.int64)
+            distance = 100 - values if dies_at_top else values
+            step = delta if dies_at_top else -delta
+            if step > 0:
+                death = np.minimum(death, np.maximum(1, -(-distance // step)))
+            elif step == 0:
+                death = np.minimum(death, np.where(distance <= 0, 1, never))
+
+        dies = alive & (death <= ticks)
+        steps = np.where(alive, np.minimum(death, ticks), 0)
+        for column, delta in (
+            (self.hunger, hunger_delta),
+            (self.happiness, happiness_delta),
+            (self.energy, energy_delta),
+        ):
+            column[index] = np.clip(column[index] + steps * delta, 0, 100)
+        newly_dead = index[dies]
+        self.is_alive[newly_dead] = False
+        self.deaths[newly_dead] += 1
+        self.mood[index] = self.mood_codes(index)
+        self.ticks += 1
+        return newly_dead
+
+    def catch_up(self, row: int, now: float, interval: float,
+                 hunger_delta: int, happiness_delta: int, energy_delta: int) -> bool:
+        """Apply the whole ticks a row has missed since it was last brought up to date.
+
+        For read-time decay: nothing runs for a pet until something looks at
+        it. Returns False if no tick was due.
+        """
+        ticks = int((now - self.ticked_at[row]) // interval)
+        if ticks <= 0:
+            return False
+        self.ticked_at[row] += ticks * interval
+        self.advance(ticks, hunger_delta, happiness_delta, energy_delta, rows=[row])
+        return True
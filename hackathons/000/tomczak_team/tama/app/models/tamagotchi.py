@@ -1,8 +1,32 @@
-from datetime import datetime, timezone
-from pydantic import BaseModel, Field
+from datetime import datetime, timedelta, timezone
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional
+import itertools
 import json
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib json module is used otherwise
+    orjson = None
+
+
+# Every mood get_mood_emoji() can return; the index is the mood's compact code
+MOOD_EMOJIS = ("💀", "😵", "😴", "😢", "😊", "🙂", "😐", "😔")
+MOOD_CODES = {emoji: code for code, emoji in enumerate(MOOD_EMOJIS)}
+
+# Source of TamagotchiState versions; shared so a replaced state never reuses one
+_versions = itertools.count(1)
+
+# Minutes without care at which get_neglect_level() moves to levels 1, 2 and 3
+NEGLECT_LEVEL_MINUTES = (5, 15, 30)
+
+
+def dumps_json(data) -> bytes:
+    """Encode to compact JSON bytes, with orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
 
 class TamagotchiState(BaseModel):
     """Core state model for the Tamagotchi pet."""
@@ -31,6 +55,15 @@ class TamagotchiState(BaseModel):
     total_interactions: int = 0
     deaths: int = 0
     
+    # When the pet dies if nobody cares for it; set whenever its deadline is armed
+    death_at: Optional[datetime] = None
+    
+    # field -> (datetime, its ISO string), reused while the timestamp is unchanged
+    _iso_cache: dict = PrivateAttr(default_factory=dict)
+    # Replaced on every field assignment; the encoded snapshot is valid for one version
+    _version: int = PrivateAttr(default_factory=lambda: next(_versions))
+    _snapshot: Optional[tuple] = PrivateAttr(default=None)
+    
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
@@ -78,6 +111,14 @@ class TamagotchiState(BaseModel):
         else:
             return 3  # Very neglected
     
+    def get_next_neglect_change(self) -> Optional[datetime]:
+        """When get_neglect_level() will next go up, or None if already at max."""
+        level = self.get_neglect_level()
+        if level >= len(NEGLECT_LEVEL_MINUTES):
+            return None
+        oldest = min(self.last_fed, self.last_played, self.last_pet)
+        return oldest + timedelta(minutes=NEGLECT_LEVEL_MINUTES[level])
+    
     def should_die(self) -> bool:
         """Check if Tamagotchi should die based on stats."""
         return self.hunger >= 100 or self.happiness <= 0 or self.energy <= 0
@@ -100,24 +141,150 @@ class TamagotchiState(BaseModel):
         """Update current mood based on stats."""
         self.current_mood = self.get_mood_emoji()
     
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            private = self.__pydantic_private__
+            private["_version"] = next(_versions)
+            private["_snapshot"] = None
+    
+    @property
+    def version(self) -> int:
+        """Increases on every change to the state."""
+        return self.__pydantic_private__["_version"]
+    
+    def __eq__(self, other) -> bool:
+        # Compare fields only; the ISO string cache is not part of the state
+        if not isinstance(other, TamagotchiState):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+    
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        data = self.model_dump()
-        # Convert datetime objects to ISO strings
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
+        # One pass in precompiled field order, datetimes as (cached) ISO strings
+        values = self.__dict__
+        iso_cache = self.__pydantic_private__["_iso_cache"]
+        data = {}
+        for name, is_datetime in _SERIALIZED_FIELDS:
+            value = values[name]
+            if is_datetime and value is not None:
+                cached = iso_cache.get(name)
+                if cached is None or cached[0] is not value:
+                    cached = iso_cache[name] = (value, value.isoformat())
+                value = cached[1]
+            data[name] = value
         return data
     
+    def to_json(self) -> bytes:
+        """Serialize straight to JSON bytes."""
+        return dumps_json(self.to_dict())
+    
+    def snapshot(self) -> bytes:
+        """JSON bytes of the current state, encoded at most once per version."""
+        return self._cached_snapshot()[0]
+    
+    def snapshot_text(self) -> str:
+        """Same as snapshot(), decoded for text transports like WebSocket."""
+        return self._cached_snapshot()[1]
+    
+    def _cached_snapshot(self) -> tuple:
+        private = self.__pydantic_private__
+        if private["_snapshot"] is None:
+            raw = self.to_json()
+            private["_snapshot"] = (raw, raw.decode())
+        return private["_snapshot"]
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'TamagotchiState':
         """Create instance from dictionary."""
-        # Convert ISO strings back to datetime objects
-        datetime_fields = ['last_fed', 'last_played', 'last_slept', 'last_pet', 'created_at']
-        for field in datetime_fields:
-            if field in data and isinstance(data[field], str):
-                data[field] = datetime.fromisoformat(data[field])
-        return cls(**data)
+        # Pydantic parses the ISO timestamp strings itself
+        return cls.model_validate(data)
+    
+    @classmethod
+    def from_json(cls, raw) -> 'TamagotchiState':
+        """Create instance from JSON text or bytes, e.g. a save file."""
+        return cls.model_validate_json(raw)
+
+
+# (field name, is datetime) in serialization order, computed once
+_SERIALIZED_FIELDS = tuple(
+    (name, info.annotation in (datetime, Optional[datetime]))
+    for name, info in TamagotchiState.model_fields.items()
+)
+
+
+class CompactTamagotchiState:
+    """Slim in-memory form of TamagotchiState for holding many pets.
+    
+    Timestamps are integer microseconds since the epoch (death_at is None
+    when there's no predicted death) and the mood is a code into
+    MOOD_EMOJIS, so there are no datetime objects, no per-instance __dict__
+    and no validation. Convert with from_state()/to_state() at the API
+    boundary.
+    """
+    
+    __slots__ = (
+        "name", "age", "hunger", "happiness", "energy", "is_alive", "mood",
+        "last_fed", "last_played", "last_slept", "last_pet", "created_at",
+        "total_interactions", "deaths", "death_at",
+    )
+    
+    _DATETIME_FIELDS = ("last_fed", "last_played", "last_slept", "last_pet", "created_at")
+    
+    @classmethod
+    def from_state(cls, state: TamagotchiState) -> 'CompactTamagotchiState':
+        """Pack a pydantic state into the compact form."""
+        compact = cls.__new__(cls)
+        compact.name = state.name
+        compact.age = state.age
+        compact.hunger = state.hunger
+        compact.happiness = state.happiness
+        compact.energy = state.energy
+        compact.is_alive = state.is_alive
+        compact.mood = MOOD_CODES.get(state.current_mood, MOOD_CODES["😐"])
+        for field in cls._DATETIME_FIELDS:
+            setattr(compact, field, _to_epoch_us(getattr(state, field)))
+        compact.total_interactions = state.total_interactions
+        compact.deaths = state.deaths
+        compact.death_at = _to_epoch_us(state.death_at) if state.death_at is not None else None
+        return compact
+    
+    def to_state(self) -> TamagotchiState:
+        """Unpack into a pydantic state (values were validated when packed)."""
+        return TamagotchiState.model_construct(
+            name=self.name,
+            age=self.age,
+            hunger=self.hunger,
+            happiness=self.happiness,
+            energy=self.energy,
+            is_alive=self.is_alive,
+            current_mood=MOOD_EMOJIS[self.mood],
+            total_interactions=self.total_interactions,
+            deaths=self.deaths,
+            death_at=_from_epoch_us(self.death_at) if self.death_at is not None else None,
+            **{field: _from_epoch_us(getattr(self, field)) for field in self._DATETIME_FIELDS}
+        )
+    
+    @property
+    def current_mood(self) -> str:
+        return MOOD_EMOJIS[self.mood]
+    
+    def should_die(self) -> bool:
+        """Same rule as TamagotchiState.should_die()."""
+        return self.hunger >= 100 or self.happiness <= 0 or self.energy <= 0
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_epoch_us(value: datetime) -> int:
+    """Exact integer microseconds since the epoch (no float rounding)."""
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_epoch_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
 
 
 class ActionResult(BaseModel):
@@ -0,0 +1,433 @@
+import asyncio
+import glob
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from urllib.parse import quote, unquote
+
+from lib.game_logic import GameEngine
+from app.decay import DecayRates, ticks_until_critical, ticks_until_death
+from app.models.pet_table import PetTable
+from app.models.tamagotchi import CompactTamagotchiState, TamagotchiState
+
+
+DEFAULT_PET_ID = "default"
+
+# Deadlines land this long after the tick they wait for, so the tick has run by then
+TICK_GRACE_SECONDS = 0.05
+
+
+class PetEngine(GameEngine):
+    """GameEngine for a pet created through the registry.
+
+    It saves to its own file instead of the default pet's save file, and
+    has no background loop of its own: its stats live in a row of the
+    registry's PetTable, which the shared tick decays for all pets at once
+    (or, with lazy decay, which is caught up whenever the pet is read).
+    The pydantic state is only brought up to date with its row when
+    something reads `tamagotchi`; changes made through it are written back
+    to the row by flush() before the next tick.
+
+    Only recently read pets keep a pydantic state. The registry freezes
+    the rest: their row keeps the stats and a CompactTamagotchiState the
+    other fields, and `tamagotchi` thaws them on the next read.
+    """
+
+    def __init__(self, pet_id: str, save_path: str, registry: "PetRegistry"):
+        self.pet_id = pet_id
+        self.save_path = save_path
+        self._registry = registry
+        self._state: Optional[TamagotchiState] = None
+        self._compact: Optional[CompactTamagotchiState] = None
+        self._row: Optional[int] = None
+        # Table tick count and state version as of the last sync with the row
+        self._synced_tick = -1
+        self._synced_version = -1
+        super().__init__()
+
+    @property
+    def tamagotchi(self) -> Optional[TamagotchiState]:
+        state = self._state
+        if state is None:
+            state = self._thaw()
+            if state is None:
+                return None
+        registry = self._registry
+        table = registry.table
+        registry._keep_hot(self)
+        if registry.lazy:
+            # No tick loop: apply whatever ticks are due now, at read time
+            self.flush()
+            rates = registry.rates
+            was_alive = bool(table.is_alive[self._row])
+            if table.catch_up(self._row, time.time(), rates.interval, rates.hunger, rates.happiness, rates.energy):
+                table.read_row(self._row, state)
+                self._synced_version = state.version
+                if was_alive and not state.is_alive:
+                    # Died while nobody was looking: save it like the tick loop would
+                    registry.died(self.pet_id)
+            return state
+        if self._row is not None and self._synced_tick != table.ticks:
+            if state.version == self._synced_version:
+                table.read_row(self._row, state)
+            else:
+                # Edited through an old reference after the last flush: the edit wins
+                table.write_row(self._row, state)
+            self._synced_tick = table.ticks
+            self._synced_version = state.version
+        # The caller may change it; check it at the next flush
+        registry._touched.add(self)
+        return state
+
+    @tamagotchi.setter
+    def tamagotchi(self, state: Optional[TamagotchiState]):
+        self._state = state
+        self._compact = None
+        self._synced_version = -1
+        self._registry._touched.add(self)
+        if state is not None:
+            self._registry._keep_hot(self)
+
+    def freeze(self):
+        """Drop the pydantic state, keeping the row and a compact copy of the rest."""
+        state = self._state
+        if state is None:
+            return
+        self.flush()
+        self._compact = CompactTamagotchiState.from_state(state)
+        self._state = None
+        self._registry._touched.discard(self)
+
+    def _thaw(self) -> Optional[TamagotchiState]:
+        compact = self._compact
+        if compact is None:
+            return None
+        state = compact.to_state()
+        table = self._registry.table
+        if self._row is not None:
+            table.read_row(self._row, state)
+        self._state = state
+        self._compact = None
+        self._synced_tick = table.ticks
+        self._synced_version = state.version
+        return state
+
+    def flush(self):
+        """Copy local changes to the state into the pet's table row."""
+        state = self._state
+        if state is None or state.version == self._synced_version:
+            return
+        table = self._registry.table
+        if self._row is None:
+            self._row = table.add(self.pet_id, state)
+        else:
+            table.write_row(self._row, state)
+        self._synced_tick = table.ticks
+        self._synced_version = state.version
+
+    def detach(self):
+        """Stop the table from decaying this pet's row once it's been removed."""
+        self._registry._touched.discard(self)
+        self._registry._hot.pop(self, None)
+        if self._row is not None:
+            self._registry.table.is_alive[self._row] = False
+
+    async def load_state(self) -> Optional[TamagotchiState]:
+        if not os.path.exists(self.save_path):
+            return None
+        with open(self.save_path, "rb") as f:
+            self.tamagotchi = TamagotchiState.from_json(f.read())
+        return self.tamagotchi
+
+    async def save_state(self):
+        if self.tamagotchi is None:
+            return
+        # Write then rename, so a crash mid-save never leaves a torn file
+        tmp_path = f"{self.save_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.tamagotchi.to_json())
+        os.replace(tmp_path, self.save_path)
+
+    async def reset_game(self) -> TamagotchiState:
+        name = self.tamagotchi.name if self.tamagotchi else "Tama"
+        state = await self.create_new_tamagotchi(name)
+        await self.save_state()
+        return state
+
+    async def feed(self):
+        return await self._saved(await super().feed())
+
+    async def play(self):
+        return await self._saved(await super().play())
+
+    async def sleep(self):
+        return await self._saved(await super().sleep())
+
+    async def pet(self):
+        return await self._saved(await super().pet())
+
+    async def revive(self):
+        return await self._saved(await super().revive())
+
+    async def _saved(self, result):
+        await self.save_state()
+        return result
+
+    async def start_background_updates(self):
+        pass
+
+    async def stop_background_updates(self):
+        pass
+
+
+class PetRegistry:
+    """Holds one GameEngine per pet, sharded by pet ID.
+
+    The default pet keeps its own engine and loop. Every other pet is a
+    PetEngine saved under `save_dir` and backed by a row of `table`; one
+    shared tick (start_ticking()) decays the whole table rather than a
+    timer task per pet. With `lazy` set there is no tick at all: each pet
+    catches up on the ticks it missed, in closed form, when it's read.
+
+    At most `hot_limit` pets hold a full pydantic state at a time; the least
+    recently read ones beyond that are frozen to their compact form.
+
+    With `owned_prefixes`, the registry only holds pets whose IDs start
+    with one of them, so processes sharing a bridge (and a save_dir) each
+    serve their own pets; without, it owns every pet.
+    """
+
+    def __init__(self, shard_count: int = 64, save_dir: str = "pets", hot_limit: int = 256,
+                 owned_prefixes: Sequence[str] = ()):
+        self.shard_count = shard_count
+        self.save_dir = save_dir
+        self.hot_limit = hot_limit
+        self.owned_prefixes = tuple(owned_prefixes)
+        self.rates = DecayRates()
+        self.lazy = False
+        self.table = PetTable()
+        self._touched: Set[PetEngine] = set()
+        # Pets holding a pydantic state, least recently read first
+        self._hot: "OrderedDict[PetEngine, None]" = OrderedDict()
+        self._shards: List[Dict[str, GameEngine]] = [{} for _ in range(shard_count)]
+        self._locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(shard_count)]
+        self._tick_task: Optional[asyncio.Task] = None
+        self._on_death: Optional[Callable[[str], Awaitable[None]]] = None
+        self._death_tasks: Set[asyncio.Task] = set()
+        # POSIX time the shared tick is next due
+        self._next_tick_at: Optional[float] = None
+
+    def _shard_index(self, pet_id: str) -> int:
+        return hash(pet_id) % self.shard_count
+
+    def owns(self, pet_id: str) -> bool:
+        """Whether this process serves the pet (rather than another one on the bridge)."""
+        return not self.owned_prefixes or pet_id.startswith(self.owned_prefixes)
+
+    def get(self, pet_id: str) -> Optional[GameEngine]:
+        """Look up the engine for a pet, or None if it doesn't exist."""
+        return self._shards[self._shard_index(pet_id)].get(pet_id)
+
+    def lock_for(self, pet_id: str) -> asyncio.Lock:
+        """Get the lock guarding the shard that owns this pet."""
+        return self._locks[self._shard_index(pet_id)]
+
+    def register(self, pet_id: str, engine: GameEngine):
+        """Store an already initialized engine under the given pet ID."""
+        self._shards[self._shard_index(pet_id)][pet_id] = engine
+
+    def _keep_hot(self, engine: PetEngine):
+        hot = self._hot
+        hot[engine] = None
+        hot.move_to_end(engine)
+        while len(hot) > max(1, self.hot_limit):
+            cold, _ = hot.popitem(last=False)
+            cold.freeze()
+
+    def save_path(self, pet_id: str) -> str:
+        # Quoted so a pet ID can't point outside save_dir
+        return os.path.join(self.save_dir, quote(pet_id, safe="") + ".json")
+
+    def _new_engine(self, pet_id: str, save_path: str) -> PetEngine:
+        return PetEngine(pet_id, save_path, self)
+
+    async def create(self, pet_id: str, name: str) -> GameEngine:
+        """Create (or re-create) a pet and save it."""
+        if not self.owns(pet_id):
+            raise ValueError(f"Pet {pet_id} belongs to another process")
+        async with self.lock_for(pet_id):
+            engine = self.get(pet_id)
+            if engine is None:
+                os.makedirs(self.save_dir, exist_ok=True)
+                engine = self._new_engine(pet_id, self.save_path(pet_id))
+                self.register(pet_id, engine)
+            await engine.create_new_tamagotchi(name)
+            await engine.save_state()
+            return engine
+
+    async def load_saved(self) -> int:
+        """Register every pet saved under save_dir; returns how many were loaded."""
+        loaded = 0
+        for path in glob.glob(os.path.join(self.save_dir, "*.json")):
+            pet_id = unquote(os.path.basename(path)[:-len(".json")])
+            if pet_id == DEFAULT_PET_ID or pet_id in self or not self.owns(pet_id):
+                continue
+            engine = self._new_engine(pet_id, path)
+            try:
+                if await engine.load_state() is None:
+                    continue
+            except ValueError as e:
+                print(f"Skipping unreadable save for pet {pet_id}: {e}")
+                continue
+            self.register(pet_id, engine)
+            loaded += 1
+        return loaded
+
+    async def remove(self, pet_id: str) -> bool:
+        """Stop and drop a pet. Returns False if it didn't exist."""
+        async with self.lock_for(pet_id):
+            engine = self._shards[self._shard_index(pet_id)].pop(pet_id, None)
+        if engine is None:
+            return False
+        await engine.stop_background_updates()
+        if isinstance(engine, PetEngine):
+            engine.detach()
+            if os.path.exists(engine.save_path):
+                os.remove(engine.save_path)
+        return True
+
+    async def start_ticking(self, rates: DecayRates, on_death: Optional[Callable[[str], Awaitable[None]]] = None,
+                            lazy: bool = False):
+        """Decay every registry pet once per `rates.interval` seconds in a single task.
+
+        With `lazy`, no task is started and pets decay when they're read;
+        deaths then surface when something (like a deadline) reads the pet,
+        and are saved and passed to `on_death` from there.
+        """
+        self.rates = rates
+        self.lazy = lazy
+        self._on_death = on_death
+        if lazy:
+            # Rows that went unread until now start counting from here
+            for engine in self._touched:
+                engine.flush()
+            self._touched.clear()
+            self.table.ticked_at[:self.table.size] = time.time()
+        elif self._tick_task is None:
+            self._next_tick_at = time.time() + rates.interval
+            self._tick_task = asyncio.create_task(self._tick_loop())
+
+    def tick(self, ticks: int = 1) -> List[str]:
+        """Apply `ticks` ticks of decay to every registry pet; returns the IDs of pets that died."""
+        for engine in self._touched:
+            engine.flush()
+        self._touched.clear()
+        rates = self.rates
+        died = self.table.advance(ticks, rates.hunger, rates.happiness, rates.energy)
+        return [self.table.pet_ids[row] for row in died]
+
+    def died(self, pet_id: str):
+        """Save a pet that died outside the tick loop and report it to on_death, in the background."""
+        task = asyncio.create_task(self._handle_death(pet_id))
+        self._death_tasks.add(task)
+        task.add_done_callback(self._death_tasks.discard)
+
+    async def _handle_death(self, pet_id: str):
+        engine = self.get(pet_id)
+        if engine is not None:
+            await engine.save_state()
+        if self._on_death is not None:
+            try:
+                await self._on_death(pet_id)
+            except Exception as e:
+                print(f"Error handling death of pet {pet_id}: {e}")
+
+    async def _tick_loop(self):
+        due = time.monotonic() + self.rates.interval
+        while True:
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            # A stalled loop catches up on every tick it missed in one pass
+            ticks = 1 + int((time.monotonic() - due) // self.rates.interval)
+            due += ticks * self.rates.interval
+            self._next_tick_at = time.time() + (due - time.monotonic())
+            for pet_id in self.tick(ticks):
+                await self._handle_death(pet_id)
+
+    def tick_time(self, pet_id: str, ticks: int) -> Optional[datetime]:
+        """When a registry pet will have gone through `ticks` more ticks of decay.
+
+        None for pets whose ticks the registry doesn't drive (the default
+        pet's own loop runs on a schedule we can't see).
+        """
+        interval = self.rates.interval
+        engine = self.get(pet_id)
+        if not isinstance(engine, PetEngine):
+            return None
+        if self.lazy:
+            if engine._row is None:
+                return None
+            # Its state was last caught up to ticked_at
+            start = self.table.ticked_at[engine._row]
+        elif self._next_tick_at is not None:
+            start = max(self._next_tick_at, time.time()) - interval
+        else:
+            return None
+        return datetime.fromtimestamp(start + ticks * interval + TICK_GRACE_SECONDS, timezone.utc)
+
+    def next_deadline(self, pet_id: str, state: TamagotchiState) -> Optional[datetime]:
+        """The next time a pet crosses a threshold if left alone.
+
+        That's the earliest of its next neglect level, entering a critical
+        mood (starving, exhausted or miserable) and death, the last two
+        following from the per-tick rates. Also records the predicted time
+        of death on the state as death_at.
+
+        Only pets the registry ticks get the last two; for any other engine
+        they'd be a guess, so it gets the neglect change and no death_at.
+        """
+        death = ticks_until_death(state, self.rates)
+        death_at = self.tick_time(pet_id, death) if death is not None else None
+        if state.death_at != death_at:
+            state.death_at = death_at
+        deadlines = [state.get_next_neglect_change(), death_at]
+        critical = ticks_until_critical(state, self.rates)
+        if critical is not None:
+            deadlines.append(self.tick_time(pet_id, critical))
+        deadlines = [deadline for deadline in deadlines if deadline is not None]
+        return min(deadlines) if deadlines else None
+
+    async def stop_all(self):
+        """Stop the shared tick and every engine's background updates, saving registry pets."""
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+            try:
+                await self._tick_task
+            except asyncio.CancelledError:
+                pass
+            self._tick_task = None
+        if self._death_tasks:
+            await asyncio.gather(*self._death_tasks, return_exceptions=True)
+        for engine in list(self.engines()):
+            await engine.stop_background_updates()
+            if isinstance(engine, PetEngine):
+                await engine.save_state()
+
+    def pet_ids(self) -> Iterator[str]:
+        for shard in self._shards:
+            yield from shard.keys()
+
+    def engines(self) -> Iterator[GameEngine]:
+        for shard in self._shards:
+            yield from shard.values()
+
+    def items(self) -> Iterator[Tuple[str, GameEngine]]:
+        for shard in self._shards:
+            yield from list(shard.items())
+
+    def __contains__(self, pet_id: str) -> bool:
+        return self.get(pet_id) is not None
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
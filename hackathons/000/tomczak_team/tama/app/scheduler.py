@@ -0,0 +1,89 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class DeadlineScheduler:
+    """Min-heap of per-pet deadlines that sleeps until the earliest one is due.
+
+    Each pet has at most one live deadline. Rescheduling pushes a new heap
+    entry and leaves the old one behind as a stale entry that is skipped
+    when it reaches the top, so both schedule() and cancel() are cheap.
+    """
+
+    def __init__(self, on_deadline: Callable[[str], Awaitable[None]]):
+        self.on_deadline = on_deadline
+        self._heap: List[Tuple[float, int, str]] = []
+        self._live: Dict[str, int] = {}  # pet_id -> sequence number of its live entry
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, pet_id: str, deadline: Optional[datetime]):
+        """Set (or replace) a pet's next deadline. None cancels it."""
+        if deadline is None:
+            self.cancel(pet_id)
+            return
+        seq = next(self._seq)
+        self._live[pet_id] = seq
+        heapq.heappush(self._heap, (deadline.timestamp(), seq, pet_id))
+        if self._heap[0][1] == seq:
+            # New earliest deadline: wake the runner so it re-arms its sleep
+            self._wakeup.set()
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._compact()
+
+    def cancel(self, pet_id: str):
+        """Forget a pet's pending deadline."""
+        self._live.pop(pet_id, None)
+
+    def next_deadline(self) -> Optional[float]:
+        """POSIX time of the earliest live deadline, if any."""
+        while self._heap and self._live.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pending_count(self) -> int:
+        return len(self._live)
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._live.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+                continue  # An earlier deadline was scheduled
+            except asyncio.TimeoutError:
+                pass
+
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, pet_id = heapq.heappop(self._heap)
+                if self._live.get(pet_id) != seq:
+                    continue
+                del self._live[pet_id]
+                try:
+                    await self.on_deadline(pet_id)
+                except Exception as e:
+                    print(f"Error handling deadline for pet {pet_id}: {e}")
@@ -0,0 +1,118 @@
+"""Cross-worker broadcast throughput through the Unix-socket broker.
+
+Starts a broker and N worker processes, each with its own ConnectionManager
+and fake clients. Worker 0 broadcasts; the benchmark measures how fast the
+broadcasts reach the clients of every other worker.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_bridge --workers 4 --messages 5000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+
+from app.api.bridge import BroadcastBroker, UnixSocketBridge
+from app.api.websocket import ConnectionManager
+
+
+class CountingWebSocket:
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.received += 1
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+async def worker(index: int, path: str, args, ready, go, results):
+    bridge = UnixSocketBridge(path, reconnect_delay=0.05)
+    manager = ConnectionManager(max_queue_size=args.messages, bridge=bridge)
+    clients = [CountingWebSocket() for _ in range(args.clients)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        await manager.start_bridge()
+        await bridge.wait_connected()
+        for client in clients:
+            await manager.connect(client)
+    ready.release()
+    await asyncio.get_running_loop().run_in_executor(None, go.wait)
+
+    start = time.perf_counter()
+    if index == 0:
+        for i in range(args.messages):
+            await manager.broadcast({"type": "tick", "n": i}, pet_id=None)
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+        await asyncio.sleep(0.5)
+    else:
+        deadline = start + args.timeout
+        while any(c.received < args.messages for c in clients) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    results.put((index, elapsed, min(c.received for c in clients)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        for client in clients:
+            manager.disconnect(client)
+        await manager.stop_bridge()
+
+
+def run_worker(index, path, args, ready, go, results):
+    asyncio.run(worker(index, path, args, ready, go, results))
+
+
+async def run(args):
+    path = os.path.join(tempfile.mkdtemp(), "bridge.sock")
+    broker = BroadcastBroker(path)
+    await broker.start()
+
+    ctx = multiprocessing.get_context("spawn")
+    ready, go, results = ctx.Semaphore(0), ctx.Event(), ctx.Queue()
+    processes = [ctx.Process(target=run_worker, args=(i, path, args, ready, go, results))
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+
+    loop = asyncio.get_running_loop()
+    for _ in processes:
+        await loop.run_in_executor(None, ready.acquire)
+    go.set()
+
+    rows = []
+    for _ in processes:
+        rows.append(await loop.run_in_executor(None, results.get))
+    for process in processes:
+        await loop.run_in_executor(None, process.join)
+    await broker.stop()
+
+    print(f"{args.workers} workers x {args.clients} clients, {args.messages} broadcasts from worker 0")
+    for index, elapsed, received in sorted(rows):
+        if index == 0:
+            continue
+        rate = received / elapsed if elapsed else 0
+        print(f"  worker {index}: {received}/{args.messages} delivered per client "
+              f"in {elapsed * 1000:.0f} ms ({rate:,.0f} msg/s)")
+    print(f"  broker relayed {broker.relayed} frames")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Broadcast fan-out with a few slow clients: sequential sends vs per-client queues.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_broadcast --clients 5000 --slow 5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from app.api.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    """Just enough of a WebSocket to measure delivery."""
+
+    def __init__(self, send_delay: float = 0.0):
+        self.send_delay = send_delay
+        self.received = 0
+        self.last_received_at = 0.0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.send_delay)
+        self.received += 1
+        self.last_received_at = time.perf_counter()
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+def make_clients(count: int, slow: int, slow_delay: float) -> list:
+    return [FakeWebSocket(slow_delay if i < slow else 0.0) for i in range(count)]
+
+
+async def sequential_fanout(clients: list, messages: int) -> float:
+    """The previous broadcast(): await each send_text in turn."""
+    start = time.perf_counter()
+    for i in range(messages):
+        for client in clients:
+            await client.send_text(f'{{"n": {i}}}')
+    return time.perf_counter() - start
+
+
+async def queued_fanout(clients: list, messages: int, slow_timeout: float):
+    manager = ConnectionManager(max_queue_size=2, slow_client_timeout=slow_timeout)
+    for client in clients:
+        await manager.connect(client)
+
+    start = time.perf_counter()
+    for i in range(messages):
+        await manager.broadcast({"n": i})
+        await asyncio.sleep(0.01)  # ticks arrive over time, not all at once
+    enqueue_done = time.perf_counter() - start
+
+    fast = [c for c in clients if c.send_delay == 0]
+    while any(c.received < messages for c in fast):
+        await asyncio.sleep(0.001)
+    fast_done = max(c.last_received_at for c in fast) - start
+
+    remaining = manager.get_connection_count()
+    for client in clients:
+        manager.disconnect(client)
+    return enqueue_done, fast_done, remaining
+
+
+async def run(args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        sequential = await sequential_fanout(
+            make_clients(args.clients, args.slow, args.slow_delay), args.messages
+        )
+        enqueue_done, fast_done, remaining = await queued_fanout(
+            make_clients(args.clients, args.slow, args.slow_delay), args.messages, args.slow_timeout
+        )
+
+    print(f"{args.clients} clients ({args.slow} slow, {args.slow_delay * 1000:.0f} ms/send), {args.messages} broadcasts")
+    print(f"  sequential: all clients served after {sequential * 1000:.0f} ms")
+    print(f"  queued:     broadcasts issued over {enqueue_done * 1000:.0f} ms, "
+          f"fast clients done at {fast_done * 1000:.0f} ms, "
+          f"{args.clients - remaining} slow clients dropped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--slow", type=int, default=5)
+    parser.add_argument("--slow-delay", type=float, default=0.1)
+    parser.add_argument("--slow-timeout", type=float, default=0.05)
+    parser.add_argument("--messages", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
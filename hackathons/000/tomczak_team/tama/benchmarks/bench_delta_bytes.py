@@ -0,0 +1,82 @@
+"""Bytes per minute per client: full state_update frames vs state_delta frames.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_delta_bytes --updates-per-minute 60
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+from datetime import datetime, timezone
+
+from app.api.websocket import ConnectionManager
+from app.models.tamagotchi import TamagotchiState
+
+
+class CountingWebSocket:
+    def __init__(self):
+        self.bytes_received = 0
+        self.frames = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.bytes_received += len(data.encode())
+        self.frames += 1
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+def mutate(state: TamagotchiState, rng: random.Random):
+    """One state change: mostly decay ticks, sometimes a player action."""
+    if rng.random() < 0.2:
+        state.hunger = max(0, state.hunger - 20)
+        state.last_fed = datetime.now(timezone.utc)
+        state.total_interactions += 1
+    else:
+        state.hunger = min(99, state.hunger + 1)
+        if rng.random() < 0.5:
+            state.energy = max(11, state.energy - 1)
+    state.update_mood()
+
+
+async def run(args):
+    rng = random.Random(42)
+    state = TamagotchiState()
+    full_client, delta_client = CountingWebSocket(), CountingWebSocket()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = ConnectionManager()
+        await manager.connect(full_client)
+        await manager.connect(delta_client, delta_mode=True)
+        await manager.send_welcome_message(full_client, state)
+        await manager.send_welcome_message(delta_client, state)
+        await asyncio.sleep(0)
+
+        for _ in range(args.updates_per_minute * args.minutes):
+            mutate(state, rng)
+            await manager.broadcast_state_update(state)
+            await asyncio.sleep(0)  # let writers drain so nothing coalesces
+
+        for client in (full_client, delta_client):
+            manager.disconnect(client)
+
+    for label, client in (("full state_update", full_client), ("state_delta", delta_client)):
+        per_minute = client.bytes_received / args.minutes
+        print(f"  {label:<18} {per_minute:10.0f} bytes/min  ({client.frames} frames)")
+    print(f"  reduction: {1 - delta_client.bytes_received / full_client.bytes_received:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates-per-minute", type=int, default=60)
+    parser.add_argument("--minutes", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Mixed LLM load against a quota-limited fake endpoint, with and without admission control.
+
+The fake endpoint answers 429 when more than --quota-concurrency requests
+run at once or more than --quota-rpm arrive within a minute. A burst of
+welcome messages is followed by actions and chat, as after a restart with
+many open tabs.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_admission
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import deque
+
+from app.llm.admission import AdmissionController
+from app.llm.gateway import LLMGateway
+from app.models.tamagotchi import TamagotchiState
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class QuotaLimitedLLMClient:
+    """Fake endpoint with a concurrency and requests-per-minute quota."""
+
+    def __init__(self, latency: float, concurrency: int, rpm: int):
+        self.latency = latency
+        self.concurrency = concurrency
+        self.rpm = rpm
+        self.client = None
+        self.running = 0
+        self.rejected = 0
+        self._recent = deque()
+
+    async def get_response(self, state, action, user_message=None, action_result=None):
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        if self.running >= self.concurrency or len(self._recent) >= self.rpm:
+            self.rejected += 1
+            raise RateLimitError("429 Too Many Requests")
+        self._recent.append(now)
+        self.running += 1
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.running -= 1
+        return f"{action} reply"
+
+    def get_cache_stats(self) -> dict:
+        return {"cache_size": 0}
+
+
+async def timed(gateway: LLMGateway, state, action: str, message: str, results: dict):
+    start = time.perf_counter()
+    try:
+        await gateway.get_response(state, action=action, user_message=message)
+        results.setdefault(action, []).append(time.perf_counter() - start)
+    except RateLimitError:
+        results.setdefault(f"{action} (429)", []).append(0.0)
+
+
+async def load(args, admission):
+    upstream = QuotaLimitedLLMClient(args.latency_ms / 1000, args.quota_concurrency, args.quota_rpm)
+    gateway = LLMGateway(upstream, admission=admission)
+    state = TamagotchiState()
+    results = {}
+    tasks = []
+    # Distinct user messages so nothing is served from the cache or coalesced
+    for i in range(args.welcomes):
+        tasks.append(asyncio.create_task(timed(gateway, state, "create", f"welcome {i}", results)))
+    await asyncio.sleep(0.01)
+    for i in range(args.chats):
+        tasks.append(asyncio.create_task(timed(gateway, state, "talk", f"hi {i}", results)))
+        tasks.append(asyncio.create_task(timed(gateway, state, "feed", f"feed {i}", results)))
+    await asyncio.gather(*tasks)
+    return results, upstream.rejected
+
+
+async def run(args):
+    print(f"{args.welcomes} welcomes then {args.chats} chats + {args.chats} feeds; "
+          f"quota {args.quota_concurrency} concurrent / {args.quota_rpm} rpm")
+    for label, admission in (
+        ("no admission", None),
+        ("admission", AdmissionController(max_in_flight=args.quota_concurrency, requests_per_minute=args.quota_rpm)),
+    ):
+        results, rejected = await load(args, admission)
+        print(f"  {label}: {rejected} rejected with 429")
+        for action in ("talk", "feed", "create"):
+            latencies = results.get(action, [])
+            if latencies:
+                print(f"    {action:<7} {len(latencies):3d} ok, median {statistics.median(latencies) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--welcomes", type=int, default=40)
+    parser.add_argument("--chats", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--quota-concurrency", type=int, default=4)
+    parser.add_argument("--quota-rpm", type=int, default=600)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Upstream round trips when many pets act at once: per-pet calls vs batched commentary.
+
+Uses a local fake chat endpoint that answers batched prompts with a JSON
+array; --bad-batches makes a share of them malformed to exercise the
+per-pet fallback.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_batching --pets 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.llm.batching import CommentaryBatcher
+from app.models.tamagotchi import TamagotchiState
+from benchmarks.bench_llm_single_flight import FakeLLMClient
+
+
+class FakeBatchEndpoint:
+    def __init__(self, latency: float, bad_share: float, seed: int):
+        self.latency = latency
+        self.bad_share = bad_share
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    async def send_batch(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        count = int(prompt.split(" ", 1)[0])
+        if self.rng.random() < self.bad_share:
+            return "Sorry, here are some replies: ..."
+        return json.dumps([f"reply {i}" for i in range(count)])
+
+
+async def burst(batcher: CommentaryBatcher, pets: int) -> float:
+    states = [TamagotchiState(name=f"pet-{i}") for i in range(pets)]
+    start = time.perf_counter()
+    await asyncio.gather(*[batcher.get_response(state, "feed", action_result={"success": True}) for state in states])
+    return time.perf_counter() - start
+
+
+async def run(args):
+    latency = args.latency_ms / 1000
+    print(f"{args.pets} pets acting at once, {args.latency_ms:.0f} ms per LLM call")
+
+    single = FakeLLMClient(latency)
+    elapsed = await burst(CommentaryBatcher(single, None), args.pets)
+    print(f"  per-pet calls: {single.calls:3d} round trips, {elapsed * 1000:6.0f} ms")
+
+    single = FakeLLMClient(latency)
+    endpoint = FakeBatchEndpoint(latency, args.bad_batches, args.seed)
+    batcher = CommentaryBatcher(single, endpoint.send_batch, window=args.window_ms / 1000, max_batch=args.max_batch)
+    elapsed = await burst(batcher, args.pets)
+    stats = batcher.stats()
+    print(f"  batched:       {endpoint.calls + single.calls:3d} round trips, {elapsed * 1000:6.0f} ms "
+          f"({stats['batches']} batches, {stats['batch_fallbacks']} fell back to per-pet calls)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pets", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--window-ms", type=float, default=50)
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--bad-batches", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Tail latency of action replies from a long-tailed fake model: no budget vs deadline and hedging.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_budget --requests 300
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.llm.gateway import LLMGateway
+from app.models.tamagotchi import TamagotchiState
+
+
+class LongTailLLMClient:
+    """Usually fast, but a share of calls stall."""
+
+    def __init__(self, rng: random.Random, fast: float, slow: float, slow_share: float):
+        self.rng = rng
+        self.fast = fast
+        self.slow = slow
+        self.slow_share = slow_share
+        self.client = None
+        self.calls = 0
+
+    async def get_response(self, state, action, user_message=None, action_result=None):
+        self.calls += 1
+        slow = self.rng.random() < self.slow_share
+        await asyncio.sleep(self.slow if slow else self.fast * (0.5 + self.rng.random()))
+        return f"{action} reply"
+
+    def get_cache_stats(self) -> dict:
+        return {"cache_size": 0}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_config(args, **options):
+    upstream = LongTailLLMClient(random.Random(args.seed), args.fast_ms / 1000, args.slow_ms / 1000, args.slow_share)
+    gateway = LLMGateway(upstream, **options)
+    state = TamagotchiState()
+    latencies = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        # A distinct outcome per request so every one reaches the model
+        await gateway.get_response(state, action="feed", action_result={"success": True, "action_context": i})
+        latencies.append(time.perf_counter() - start)
+    return latencies, gateway.get_cache_stats(), upstream.calls
+
+
+async def run(args):
+    print(f"{args.requests} sequential actions; model {args.fast_ms:.0f} ms typical, "
+          f"{args.slow_share:.0%} stall for {args.slow_ms:.0f} ms")
+    configs = (
+        ("no budget", {}),
+        ("hedged", {"hedge": True}),
+        ("deadline + hedged", {"hedge": True, "deadlines": {"action": args.deadline_ms / 1000}}),
+    )
+    for label, options in configs:
+        latencies, stats, calls = await run_config(args, **options)
+        print(f"  {label:<18} p50 {statistics.median(latencies) * 1000:6.0f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:6.0f} ms, max {max(latencies) * 1000:6.0f} ms, "
+              f"fallback rate {stats['fallback_rate']:.1%}, {stats['hedges']} hedges, {calls} LLM calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--fast-ms", type=float, default=60)
+    parser.add_argument("--slow-ms", type=float, default=1500)
+    parser.add_argument("--slow-share", type=float, default=0.03)
+    parser.add_argument("--deadline-ms", type=float, default=800)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""LLM cache hit rate over a simulated session: exact stat keys vs 10-point buckets.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_cache --actions 5000
+"""
+import argparse
+import random
+
+from app.llm.cache import ResponseCache
+from app.llm.gateway import prompt_key
+from app.models.tamagotchi import ActionResult, TamagotchiState
+
+ACTIONS = {
+    "feed": {"hunger": -20},
+    "play": {"happiness": 15, "energy": -10},
+    "sleep": {"energy": 30},
+    "pet": {"happiness": 5},
+}
+
+
+def exact_key(state: TamagotchiState, action: str, action_result: dict) -> tuple:
+    return (action, state.current_mood, state.hunger, state.happiness, state.energy)
+
+
+def simulate(actions: int, seed: int):
+    """Yield (state, action, action_result) from a random walk of decay ticks and player actions."""
+    rng = random.Random(seed)
+    state = TamagotchiState()
+    for _ in range(actions):
+        state.hunger = min(99, state.hunger + rng.randint(0, 3))
+        state.happiness = max(11, state.happiness - rng.randint(0, 3))
+        state.energy = max(11, state.energy - rng.randint(0, 2))
+        action = rng.choice(list(ACTIONS))
+        for stat, change in ACTIONS[action].items():
+            setattr(state, stat, max(11, min(99, getattr(state, stat) + change)))
+        state.update_mood()
+        # A real ActionResult dump, as perform_action() passes it: fresh timestamp every time
+        result = ActionResult(success=True, message=f"{action} done", stat_changes=ACTIONS[action],
+                              new_mood=state.current_mood)
+        yield state, action, result.model_dump()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{args.actions} actions, cache size {args.size}")
+    for label, key_fn in (("exact stats", exact_key), ("bucketed", lambda s, a, r: prompt_key(s, a, None, r))):
+        cache = ResponseCache(max_size=args.size, ttl=float("inf"))
+        for state, action, action_result in simulate(args.actions, args.seed):
+            key = key_fn(state, action, action_result)
+            if cache.get(key) is None:
+                cache.put(key, f"{action} reply")
+        stats = cache.stats()
+        print(f"  {label:<12} hit rate {stats['hit_rate']:6.1%}  "
+              f"({stats['evictions']} evictions, ~{stats['memory_bytes'] / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""First replies after a restart: empty cache vs warmed from the on-disk cache.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_disk_cache --prompts 100
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from app.llm.disk_cache import DiskResponseCache
+from app.llm.gateway import LLMGateway
+from app.models.tamagotchi import TamagotchiState
+from benchmarks.bench_llm_single_flight import FakeLLMClient
+
+ACTIONS = ("feed", "play", "sleep", "pet")
+
+
+def states(count: int):
+    """Distinct pet states, one per 10-point bucket combination."""
+    for i in range(count):
+        yield TamagotchiState(hunger=(i % 10) * 10, happiness=((i // 10) % 10) * 10 + 5, energy=95)
+
+
+async def replay(gateway: LLMGateway, prompts: int) -> float:
+    start = time.perf_counter()
+    for i, state in enumerate(states(prompts)):
+        await gateway.get_response(state, action=ACTIONS[i % len(ACTIONS)])
+    return time.perf_counter() - start
+
+
+async def run(args):
+    path = os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite3")
+    latency = args.latency_ms / 1000
+
+    # First run fills the disk cache
+    upstream = FakeLLMClient(latency)
+    first = LLMGateway(upstream, disk_cache=DiskResponseCache(path))
+    cold = await replay(first, args.prompts)
+    first.close()
+
+    # "Restart": a fresh gateway over the same file
+    upstream = FakeLLMClient(latency)
+    second = LLMGateway(upstream, disk_cache=DiskResponseCache(path))
+    warmed = second.warm()
+    warm = await replay(second, args.prompts)
+    second.close()
+
+    print(f"{args.prompts} distinct prompts, {args.latency_ms:.0f} ms per LLM call")
+    print(f"  cold start: {cold * 1000:8.1f} ms")
+    print(f"  warm start: {warm * 1000:8.1f} ms ({warmed} replies loaded at startup, {upstream.calls} LLM calls)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
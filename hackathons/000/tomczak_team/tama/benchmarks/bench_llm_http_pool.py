@@ -0,0 +1,129 @@
+"""Chat-call latency under concurrency: default httpx client vs the pre-warmed pooled transport.
+
+A local stub server stands in for the Azure OpenAI endpoint and charges a
+connection setup cost (as a TLS handshake would) on every new connection.
+Each run sends several bursts of concurrent requests; the default client
+opens its connections cold during the first burst, the pooled one at startup.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_http_pool --concurrency 16 --bursts 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+import httpx
+
+from app.llm.transport import PooledTransport, build_http_client, prewarm
+
+
+BODY = b'{"choices": [{"message": {"content": "ok"}}]}'
+
+
+class StubServer:
+    def __init__(self, setup: float, latency: float, connections):
+        self.setup = setup
+        self.latency = latency
+        self.connections = connections
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        with self.connections.get_lock():
+            self.connections.value += 1
+        await asyncio.sleep(self.setup)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(self.latency)
+                body = b"" if head.startswith(b"HEAD ") else BODY
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (len(BODY), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(setup: float, latency: float, connections, port):
+    server = await asyncio.start_server(StubServer(setup, latency, connections).handle, "127.0.0.1", 0)
+    port.put(server.sockets[0].getsockname()[1])
+    await server.serve_forever()
+
+
+def run_server(setup, latency, connections, port):
+    asyncio.run(serve(setup, latency, connections, port))
+
+
+async def bursts(http_client: httpx.AsyncClient, url: str, args) -> list:
+    async def call() -> float:
+        start = time.perf_counter()
+        response = await http_client.post(url, json={"messages": [{"role": "user", "content": "hi"}]})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    latencies = []
+    for _ in range(args.bursts):
+        latencies += await asyncio.gather(*[call() for _ in range(args.concurrency)])
+        await asyncio.sleep(args.gap_ms / 1000)
+    return latencies
+
+
+def report(label: str, latencies: list, connections: int):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"  {label}: p50 {statistics.median(latencies) * 1000:5.1f} ms, p99 {p99 * 1000:5.1f} ms, "
+          f"{connections} connections opened")
+
+
+async def run(args):
+    # The stub runs in its own process so it doesn't compete with the clients for the event loop
+    ctx = multiprocessing.get_context("spawn")
+    connections, port = ctx.Value("i", 0), ctx.Queue()
+    server = ctx.Process(target=run_server, args=(args.setup_ms / 1000, args.latency_ms / 1000, connections, port),
+                         daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{await asyncio.get_running_loop().run_in_executor(None, port.get)}/chat/completions"
+    print(f"{args.bursts} bursts of {args.concurrency} concurrent calls, "
+          f"{args.setup_ms:.0f} ms connection setup, {args.latency_ms:.0f} ms per call")
+
+    async with httpx.AsyncClient() as http_client:
+        latencies = await bursts(http_client, url, args)
+    report("default client   ", latencies, connections.value)
+
+    connections.value = 0
+    transport = PooledTransport(max_connections=args.concurrency)
+    async with build_http_client(transport) as http_client:
+        transport.prewarmed = await prewarm(http_client, url, args.concurrency)
+        warm_connections = connections.value
+        latencies = await bursts(http_client, url, args)
+        stats = transport.stats()
+    report("pooled, prewarmed", latencies, connections.value - warm_connections)
+    print(f"  pool: {stats['open_connections']} open, peak {stats['peak_in_flight']} in flight, "
+          f"{stats['in_flight']} still in flight, {stats['prewarmed']} pre-opened")
+
+    server.terminate()
+    server.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--setup-ms", type=float, default=80)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--gap-ms", type=float, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
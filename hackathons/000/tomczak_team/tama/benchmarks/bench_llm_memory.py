@@ -0,0 +1,77 @@
+"""Talk prompt size and latency over a long chat: full history vs token-budgeted memory.
+
+The fake model's latency grows with the prompt's token count, so sending the
+whole history gets slower every turn; ConversationMemory keeps the context
+within its budget and summarizes older turns in the background.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_memory --turns 500
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.llm.memory import ConversationMemory, render_turns
+from app.llm.prompt import count_tokens
+
+
+class PromptSizedModel:
+    """Fake model: a fixed round trip plus a per-token prompt processing cost."""
+
+    def __init__(self, base: float, per_token: float):
+        self.base = base
+        self.per_token = per_token
+
+    async def reply(self, context: str, message: str) -> str:
+        await asyncio.sleep(self.base + self.per_token * count_tokens(context + message))
+        return f"Reply to: {message[:30]}"
+
+
+async def summarize(summary: str, turns) -> str:
+    await asyncio.sleep(0.05)
+    return f"{summary} The owner talked about {', '.join(message.split()[-1] for message, _ in turns)}."
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    words = ["cake", "rain", "school", "games", "music", "dreams", "friends", "cats", "work", "space"]
+    messages = [f"Let me tell you about {' and '.join(rng.sample(words, 3))}" for _ in range(args.turns)]
+    model = PromptSizedModel(args.base_ms / 1000, args.per_token_us / 1e6)
+    checkpoints = {args.turns // 10, args.turns // 2, args.turns}
+    print(f"{args.turns} talk turns, {args.base_ms:.0f} ms + {args.per_token_us:.0f} us per prompt token")
+
+    history = []
+    for turn, message in enumerate(messages, 1):
+        context = render_turns(history)
+        start = time.perf_counter()
+        history.append((message, await model.reply(context, message)))
+        if turn in checkpoints:
+            print(f"  full history, turn {turn:4d}: {count_tokens(context):6d} context tokens, "
+                  f"{(time.perf_counter() - start) * 1000:5.0f} ms")
+
+    memory = ConversationMemory(summarize, token_budget=args.budget)
+    for turn, message in enumerate(messages, 1):
+        context = memory.context("pet") or ""
+        start = time.perf_counter()
+        memory.add_turn("pet", message, await model.reply(context, message))
+        if turn in checkpoints:
+            print(f"  memory,       turn {turn:4d}: {count_tokens(context):6d} context tokens, "
+                  f"{(time.perf_counter() - start) * 1000:5.0f} ms")
+    await memory.stop()
+    print(f"  {memory.summaries} background summaries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--budget", type=int, default=600)
+    parser.add_argument("--base-ms", type=float, default=5)
+    parser.add_argument("--per-token-us", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
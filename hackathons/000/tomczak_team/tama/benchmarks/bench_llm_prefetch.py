@@ -0,0 +1,74 @@
+"""Share of button presses answered warm, with and without idle-time prefetch.
+
+Simulates a player who usually picks one of the pet's most pressing needs,
+against a local fake model, and counts presses answered in under 5 ms.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_prefetch --presses 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.llm.gateway import LLMGateway
+from app.llm.prefetch import Prefetcher, likely_actions
+from app.models.tamagotchi import ActionResult, TamagotchiState
+from benchmarks.bench_llm_cache import ACTIONS
+from benchmarks.bench_llm_single_flight import FakeLLMClient
+
+
+async def session(args, tokens_per_minute: int):
+    rng = random.Random(args.seed)
+    upstream = FakeLLMClient(args.latency_ms / 1000)
+    gateway = LLMGateway(upstream)
+    prefetcher = Prefetcher(gateway, tokens_per_minute=tokens_per_minute)
+    state = TamagotchiState()
+    latencies = []
+
+    for _ in range(args.presses):
+        ranked = likely_actions(state)
+        action = rng.choice(ranked[:2]) if rng.random() < args.predictable else rng.choice(list(ACTIONS))
+        before = state.model_copy()
+        for stat, change in ACTIONS[action].items():
+            setattr(state, stat, max(11, min(99, getattr(state, stat) + change)))
+        state.update_mood()
+
+        start = time.perf_counter()
+        result = ActionResult(success=True, message=f"You chose to {action}").model_dump()
+        await gateway.get_response(state, action=action, action_result=result, key_state=before)
+        latencies.append(time.perf_counter() - start)
+
+        prefetcher.on_state_change(state)
+        # The player looks at the screen for a moment before the next press
+        await asyncio.sleep(args.think_ms / 1000)
+        state.hunger = min(99, state.hunger + rng.randint(0, 6))
+        state.happiness = max(11, state.happiness - rng.randint(0, 6))
+        state.update_mood()
+
+    warm = sum(1 for latency in latencies if latency < 0.005) / len(latencies)
+    return warm, statistics.median(latencies), upstream.calls
+
+
+async def run(args):
+    print(f"{args.presses} presses, {args.latency_ms:.0f} ms per LLM call, {args.think_ms:.0f} ms between presses")
+    for label, budget in (("no prefetch", 0), ("prefetch", args.tokens_per_minute)):
+        warm, median, calls = await session(args, budget)
+        print(f"  {label:<12} {warm:6.1%} warm, median {median * 1000:6.1f} ms, {calls} LLM calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--presses", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--think-ms", type=float, default=300)
+    parser.add_argument("--predictable", type=float, default=0.8)
+    parser.add_argument("--tokens-per-minute", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Upstream LLM calls for a burst of identical actions, with and without single-flight.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_single_flight --callers 50
+"""
+import argparse
+import asyncio
+import time
+
+from app.llm.gateway import LLMGateway
+from app.models.tamagotchi import ActionResult, TamagotchiState
+
+
+class FakeLLMClient:
+    """Counts calls; each one takes --latency-ms."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.client = None
+        self.calls = 0
+
+    async def get_response(self, state, action, user_message=None, action_result=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return f"{action} reply"
+
+    def get_cache_stats(self) -> dict:
+        return {"cache_size": 0}
+
+
+def feed_result(state: TamagotchiState) -> dict:
+    """What perform_action() passes along: a fresh ActionResult dump, timestamp and all."""
+    return ActionResult(
+        success=True,
+        message=f"{state.name} has been fed!",
+        stat_changes={"hunger": -20},
+        new_mood=state.current_mood
+    ).model_dump()
+
+
+async def burst(llm_client, callers: int) -> float:
+    state = TamagotchiState()
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        llm_client.get_response(state, action="feed", action_result=feed_result(state))
+        for _ in range(callers)
+    ])
+    return time.perf_counter() - start
+
+
+async def run(args):
+    print(f"{args.callers} concurrent identical 'feed' requests, {args.latency_ms:.0f} ms per LLM call")
+    direct = FakeLLMClient(args.latency_ms / 1000)
+    elapsed = await burst(direct, args.callers)
+    print(f"  direct:        {direct.calls:4d} upstream calls in {elapsed * 1000:.0f} ms")
+
+    upstream = FakeLLMClient(args.latency_ms / 1000)
+    gateway = LLMGateway(upstream)
+    elapsed = await burst(gateway, args.callers)
+    print(f"  single-flight: {upstream.calls:4d} upstream calls in {elapsed * 1000:.0f} ms "
+          f"({gateway.get_cache_stats()['coalesced_calls']} coalesced)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Perceived chat latency: waiting for the whole reply vs streaming chat_delta frames.
+
+Uses a local fake model that emits its first token after --first-token-ms and
+one token every --token-ms after that, so no Azure OpenAI access is needed.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_llm_stream --tokens 60
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import time
+
+from app.api.websocket import ConnectionManager, WebSocketHandler
+from app.models.tamagotchi import TamagotchiState
+
+
+class FakeStreamingLLMClient:
+    """Stands in for TamagotchiLLMClient with a fixed token schedule."""
+
+    def __init__(self, tokens: int, first_token_delay: float, token_delay: float):
+        self.tokens = tokens
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    async def stream_response(self, state, action, user_message=None, action_result=None):
+        await asyncio.sleep(self.first_token_delay)
+        for i in range(self.tokens):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            yield f"tok{i} "
+
+    async def get_response(self, state, action, user_message=None, action_result=None):
+        return "".join([chunk async for chunk in self.stream_response(state, action, user_message, action_result)])
+
+
+class BlockingLLMClient:
+    """The same model seen through a get_response-only client."""
+
+    def __init__(self, streaming: FakeStreamingLLMClient):
+        self.get_response = streaming.get_response
+
+
+class FakeEngine:
+    def __init__(self):
+        self.state = TamagotchiState()
+
+    async def get_state(self):
+        return self.state
+
+
+class TimingWebSocket:
+    def __init__(self):
+        self.started = 0.0
+        self.first_text_at = None
+        self.done_at = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        message_type = json.loads(data)["type"]
+        now = time.perf_counter() - self.started
+        if message_type in ("chat_delta", "chat_done") and self.first_text_at is None:
+            self.first_text_at = now
+        if message_type == "chat_done":
+            self.done_at = now
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+async def measure(llm_client) -> tuple:
+    manager = ConnectionManager()
+    handler = WebSocketHandler(manager, {"default": FakeEngine()}, llm_client)
+    client = TimingWebSocket()
+    await manager.connect(client)
+
+    client.started = time.perf_counter()
+    await handler.handle_chat_message({"message": "hello"})
+    while client.done_at is None:
+        await asyncio.sleep(0.001)
+    manager.disconnect(client)
+    return client.first_text_at, client.done_at
+
+
+async def run(args):
+    streaming = FakeStreamingLLMClient(args.tokens, args.first_token_ms / 1000, args.token_ms / 1000)
+    rows = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, llm_client in (("get_response", BlockingLLMClient(streaming)), ("streamed", streaming)):
+            rows[label] = [await measure(llm_client) for _ in range(args.runs)]
+
+    print(f"fake model: {args.tokens} tokens, first after {args.first_token_ms} ms, then every {args.token_ms} ms")
+    for label, samples in rows.items():
+        first = statistics.median(s[0] for s in samples) * 1000
+        done = statistics.median(s[1] for s in samples) * 1000
+        print(f"  {label:<13} first text at {first:7.1f} ms, reply complete at {done:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--runs", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measure bytes per pet for TamagotchiState vs CompactTamagotchiState.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_pet_memory --pets 100000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+
+from app.models.tamagotchi import TamagotchiState, CompactTamagotchiState
+
+
+def make_state(rng: random.Random) -> TamagotchiState:
+    # Distinct timestamps per pet, as in a real population
+    state = TamagotchiState(
+        name=f"Pet{rng.randint(0, 10**6)}",
+        hunger=rng.randint(0, 100),
+        happiness=rng.randint(0, 100),
+        energy=rng.randint(0, 100),
+    )
+    state.last_fed -= timedelta(seconds=rng.randint(0, 3600))
+    state.last_played -= timedelta(seconds=rng.randint(0, 3600))
+    state.last_pet -= timedelta(seconds=rng.randint(0, 3600))
+    return state
+
+
+def measure(build, count: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build(count)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, size / count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pets", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    states, full_bytes, full_time = measure(lambda n: [make_state(rng) for _ in range(n)], args.pets)
+    compact, compact_bytes, compact_time = measure(
+        lambda n: [CompactTamagotchiState.from_state(s) for s in states], args.pets
+    )
+
+    start = time.perf_counter()
+    for c in compact:
+        c.to_state()
+    to_state_time = time.perf_counter() - start
+
+    print(f"pets: {args.pets}")
+    print(f"TamagotchiState:        {full_bytes:8.0f} bytes/pet  (build {full_time * 1e6 / args.pets:.2f} us/pet)")
+    print(f"CompactTamagotchiState: {compact_bytes:8.0f} bytes/pet  (pack {compact_time * 1e6 / args.pets:.2f} us/pet)")
+    print(f"to_state() at the API boundary: {to_state_time * 1e6 / args.pets:.2f} us/pet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Compare the scalar per-pet decay loop with the batched PetTable tick.
+
+Also checks that catching up N missed ticks in closed form
+(PetTable.advance, used for lazy read-time decay) ends exactly where
+PetTable.tick() called N times does, and times both.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_pet_table --sizes 10000 100000 1000000 --ticks 360
+"""
+import argparse
+import random
+import time
+
+from app.models.pet_table import PetTable
+from app.models.tamagotchi import TamagotchiState, MOOD_EMOJIS
+
+
+HUNGER_DELTA, HAPPINESS_DELTA, ENERGY_DELTA = 2, -1, -1
+
+
+def make_states(count: int) -> list:
+    rng = random.Random(42)
+    template = TamagotchiState()
+    states = []
+    for _ in range(count):
+        state = template.model_copy()
+        state.hunger = rng.randint(0, 100)
+        state.happiness = rng.randint(0, 100)
+        state.energy = rng.randint(0, 100)
+        states.append(state)
+    return states
+
+
+def scalar_tick(states: list):
+    """What a per-object updater does: one pydantic object at a time."""
+    for state in states:
+        if not state.is_alive:
+            continue
+        state.hunger = min(100, max(0, state.hunger + HUNGER_DELTA))
+        state.happiness = min(100, max(0, state.happiness + HAPPINESS_DELTA))
+        state.energy = min(100, max(0, state.energy + ENERGY_DELTA))
+        if state.should_die():
+            state.kill()
+        state.update_mood()
+        state.get_neglect_level()
+
+
+def table_tick(table: PetTable):
+    table.tick(HUNGER_DELTA, HAPPINESS_DELTA, ENERGY_DELTA)
+    table.neglect_levels()
+
+
+def repeated_tick(table: PetTable, ticks: int):
+    for _ in range(ticks):
+        table.tick(HUNGER_DELTA, HAPPINESS_DELTA, ENERGY_DELTA)
+
+
+def closed_form(table: PetTable, ticks: int):
+    table.advance(ticks, HUNGER_DELTA, HAPPINESS_DELTA, ENERGY_DELTA)
+
+
+def filled_table(states: list) -> PetTable:
+    table = PetTable(capacity=len(states))
+    for i, state in enumerate(states):
+        table.add(str(i), state)
+    return table
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--ticks", type=int, default=360, help="missed ticks to catch up on")
+    args = parser.parse_args()
+
+    print(f"{'pets':>10} {'scalar (ms)':>12} {'table (ms)':>12} {'speedup':>9}")
+    for size in args.sizes:
+        states = make_states(size)
+        table = PetTable(capacity=size)
+        for i, state in enumerate(states):
+            table.add(str(i), state)
+
+        scalar = timed(scalar_tick, states)
+        batched = timed(table_tick, table)
+
+        # Both paths must agree on the outcome
+        for i in range(0, size, max(1, size // 1000)):
+            assert MOOD_EMOJIS[table.mood[i]] == states[i].current_mood
+            assert bool(table.is_alive[i]) == states[i].is_alive
+
+        print(f"{size:>10} {scalar * 1000:>12.1f} {batched * 1000:>12.1f} {scalar / batched:>8.0f}x")
+
+    print()
+    print(f"catching up on {args.ticks} missed ticks")
+    print(f"{'pets':>10} {'tick xN (ms)':>13} {'advance (ms)':>13} {'speedup':>9}")
+    for size in args.sizes:
+        states = make_states(size)
+        stepped = filled_table(states)
+        jumped = filled_table(states)
+
+        repeated = timed(repeated_tick, stepped, args.ticks)
+        closed = timed(closed_form, jumped, args.ticks)
+
+        # The closed form must land on exactly the same table
+        for column in ("hunger", "happiness", "energy", "is_alive", "mood", "deaths"):
+            assert (getattr(stepped, column)[:size] == getattr(jumped, column)[:size]).all(), column
+
+        print(f"{size:>10} {repeated * 1000:>13.1f} {closed * 1000:>13.1f} {repeated / closed:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
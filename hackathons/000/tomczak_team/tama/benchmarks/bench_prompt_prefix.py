@@ -0,0 +1,101 @@
+"""Share of each batched prompt that a provider prompt cache can serve.
+
+Sends batches through chat_completion_sender() to a fake chat endpoint that
+counts the leading tokens it has already seen, the way provider prompt
+caching does (nothing below 1024 tokens, then in steps of 128), and compares the stable prefix layout with a prompt that
+starts with the per-batch details.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_prompt_prefix --batches 200
+"""
+import argparse
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+from app.llm.batching import BATCH_SYSTEM_PROMPT, build_batch_prompt, chat_completion_sender
+from app.llm.prompt import (
+    PROMPT_CACHE_INCREMENT, PROMPT_CACHE_MIN_TOKENS, StablePrompt, count_tokens, tokenizer_name
+)
+from app.models.tamagotchi import TamagotchiState
+
+
+class FakeCachingEndpoint:
+    """Reports the longest already-seen message prefix as cached prompt tokens.
+    
+    Like the provider, prefixes under PROMPT_CACHE_MIN_TOKENS aren't cached
+    and longer ones are cached in whole PROMPT_CACHE_INCREMENT steps.
+    """
+
+    def __init__(self):
+        self.seen = set()
+
+    async def create(self, model, messages):
+        prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
+        seen_tokens = 0
+        for end in range(len(messages), 0, -1):
+            key = json.dumps(messages[:end], ensure_ascii=False)
+            if key in self.seen:
+                seen_tokens = sum(count_tokens(message["content"]) for message in messages[:end])
+                break
+        cached_tokens = 0
+        if seen_tokens >= PROMPT_CACHE_MIN_TOKENS:
+            cached_tokens = seen_tokens // PROMPT_CACHE_INCREMENT * PROMPT_CACHE_INCREMENT
+        for end in range(1, len(messages) + 1):
+            self.seen.add(json.dumps(messages[:end], ensure_ascii=False))
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens))
+        message = SimpleNamespace(content="[]")
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=message)])
+
+
+def fake_chat_client():
+    return SimpleNamespace(chat=SimpleNamespace(completions=FakeCachingEndpoint()))
+
+
+def random_batch(rng: random.Random, max_batch: int):
+    items = []
+    for i in range(rng.randint(1, max_batch)):
+        state = TamagotchiState(name=f"pet-{i}", hunger=rng.randrange(101),
+                                happiness=rng.randrange(101), energy=rng.randrange(101))
+        items.append({"state": state, "action": rng.choice(["feed", "play", "sleep", "pet"]),
+                      "action_result": {"success": True}})
+    return items
+
+
+async def measure(prompt: StablePrompt, batches, dynamic_first: bool) -> dict:
+    send_batch = chat_completion_sender(fake_chat_client(), "fake-model", prompt)
+    for items in batches:
+        suffix = build_batch_prompt(items)
+        # The rebuilt layout puts the per-batch details ahead of the instructions
+        await send_batch(suffix + "\n\n" + BATCH_SYSTEM_PROMPT if dynamic_first else suffix)
+    return prompt.stats()
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    batches = [random_batch(rng, args.max_batch) for _ in range(args.batches)]
+    print(f"{args.batches} batches of up to {args.max_batch} pets, tokenizer: {tokenizer_name()}")
+    for label, prompt, dynamic_first in (
+        ("details first", StablePrompt(""), True),
+        ("stable prefix", StablePrompt(BATCH_SYSTEM_PROMPT), False)
+    ):
+        stats = await measure(prompt, batches, dynamic_first)
+        cached = stats["provider_cached_tokens"] / stats["provider_prompt_tokens"]
+        print(f"  {label}: {stats['provider_prompt_tokens'] / args.batches:5.0f} prompt tokens per call, "
+              f"{cached:5.1%} served from the prompt cache "
+              f"(prefix {stats['prefix_tokens']} tokens, suffix {stats['average_suffix_tokens']:.0f} on average)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Build a response bank from a local fake model and time lookups against it.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_response_bank --per-combo 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import timeit
+
+from app.llm.response_bank import BANK_ACTIONS, NEGLECT_LEVELS, ResponseBank, generate_bank, write_bank
+from app.models.tamagotchi import MOOD_EMOJIS
+
+
+class VariedLLMClient:
+    """Fake model: a different line on every call."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def get_response(self, state, action, user_message=None, action_result=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return f"{state.current_mood} {action} line #{self.calls}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--per-combo", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    llm_client = VariedLLMClient(args.latency_ms / 1000)
+    start = time.perf_counter()
+    lines = asyncio.run(generate_bank(llm_client, args.per_combo, args.concurrency))
+    generated = time.perf_counter() - start
+
+    path = os.path.join(tempfile.mkdtemp(), "response_bank.bin")
+    write_bank(path, lines)
+    total = sum(len(combo_lines) for combo_lines in lines.values())
+    print(f"generated {total} lines for {len(lines)} combinations in {generated:.1f} s "
+          f"({args.concurrency} concurrent, {args.latency_ms:.0f} ms per call); "
+          f"file is {os.path.getsize(path) / 1024:.0f} KiB")
+
+    bank = ResponseBank(path)
+    rng = random.Random(42)
+    queries = [(rng.choice(BANK_ACTIONS), rng.choice(MOOD_EMOJIS), rng.randrange(NEGLECT_LEVELS)) for _ in range(1000)]
+    n = args.lookups
+    seconds = timeit.timeit(lambda: [bank.lookup(*query) for query in queries], number=n // len(queries))
+    print(f"  lookup: {seconds / n * 1e6:.2f} us per line (vs {args.latency_ms:.0f} ms for the model)")
+    bank.close()
+
+
+if __name__ == "__main__":
+    main()
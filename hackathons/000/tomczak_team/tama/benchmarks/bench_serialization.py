@@ -0,0 +1,65 @@
+"""Compare the original model_dump() serializer with the single-pass one.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_serialization
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+from app.models.tamagotchi import TamagotchiState, orjson
+
+
+def legacy_to_dict(state: TamagotchiState) -> dict:
+    """The previous TamagotchiState.to_dict()."""
+    data = state.model_dump()
+    for key, value in data.items():
+        if isinstance(value, datetime):
+            data[key] = value.isoformat()
+    return data
+
+
+def legacy_from_dict(data: dict) -> TamagotchiState:
+    """The previous TamagotchiState.from_dict()."""
+    data = dict(data)
+    for field in ['last_fed', 'last_played', 'last_slept', 'last_pet', 'created_at']:
+        if field in data and isinstance(data[field], str):
+            data[field] = datetime.fromisoformat(data[field])
+    return TamagotchiState(**data)
+
+
+def report(label: str, seconds: float, number: int, baseline: float = None):
+    per_call = seconds / number * 1e6
+    suffix = f"  ({baseline / seconds:.1f}x)" if baseline else ""
+    print(f"  {label:<34} {per_call:8.2f} us{suffix}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=50_000)
+    args = parser.parse_args()
+    n = args.number
+
+    state = TamagotchiState()
+    saved = state.to_dict()
+    raw = state.to_json()
+    assert legacy_to_dict(state) == saved
+
+    print(f"orjson: {'yes' if orjson else 'no (stdlib json)'}")
+    print("serialize:")
+    legacy = timeit.timeit(lambda: json.dumps(legacy_to_dict(state)), number=n)
+    report("json.dumps(model_dump + isoformat)", legacy, n)
+    report("json.dumps(to_dict())", timeit.timeit(lambda: json.dumps(state.to_dict()), number=n), n, legacy)
+    report("to_json()", timeit.timeit(state.to_json, number=n), n, legacy)
+
+    print("load:")
+    legacy = timeit.timeit(lambda: legacy_from_dict(saved), number=n)
+    report("fromisoformat loop + cls(**data)", legacy, n)
+    report("from_dict()", timeit.timeit(lambda: TamagotchiState.from_dict(saved), number=n), n, legacy)
+    report("from_json()", timeit.timeit(lambda: TamagotchiState.from_json(raw), number=n), n, legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,15 @@ class TamagotchiApp {
         this.lastUpdate = null;
         this.buttonCooldowns = {};
         this.currentState = null;
+        this.stateVersion = null;
+        this.awaitingResync = false;
         
         // Talking animation properties
         this.isTalking = false;
         this.talkingInterval = null;
         this.originalEmoji = '';
+        this.speechHideTimer = null;
+        this.speechStreamId = null;
         
         // Emotion-based talking emoji sequences
         this.talkingEmojis = {
@@ -143,7 +147,8 @@ class TamagotchiApp {
     
     setupWebSocket() {
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws`;
+        // deltas=1: the server sends only changed fields after the first state
+        const wsUrl = `${protocol}//${window.location.host}/ws?deltas=1`;
         
         this.updateConnectionStatus('Connecting...', false);
         
@@ -192,6 +197,8 @@ class TamagotchiApp {
             case 'welcome':
                 console.log('Welcome message received');
                 if (data.data) {
+                    this.stateVersion = data.version;
+                    this.awaitingResync = false;
                     this.updateTamagotchiState(data.data);
                 }
                 this.showToast('Connected to Tamagotchi!', 'success');
@@ -199,10 +206,16 @@ class TamagotchiApp {
                 
             case 'state_update':
                 if (data.data) {
+                    this.stateVersion = data.version;
+                    this.awaitingResync = false;
                     this.updateTamagotchiState(data.data);
                 }
                 break;
                 
+            case 'state_delta':
+                this.applyStateDelta(data);
+                break;
+                
             case 'action_result':
                 this.handleActionResult(data);
                 break;
@@ -211,6 +224,18 @@ class TamagotchiApp {
                 this.showSpeechBubble(data.response);
                 break;
                 
+            case 'commentary':
+                this.showSpeechBubble(data.response);
+                break;
+                
+            case 'chat_delta':
+                this.appendSpeechText(data.stream_id, data.text);
+                break;
+                
+            case 'chat_done':
+                this.finishSpeechStream(data.stream_id, data.response);
+                break;
+                
             case 'pong':
                 console.log('Pong received');
                 break;
@@ -225,6 +250,21 @@ class TamagotchiApp {
         }
     }
     
+    applyStateDelta(data) {
+        // A delta only applies on top of the exact version it was built from
+        if (!this.currentState || data.base_version !== this.stateVersion) {
+            if (!this.awaitingResync) {
+                console.log('State version mismatch, requesting full state');
+                this.awaitingResync = true;
+                this.sendWebSocketMessage({ type: 'get_state' });
+            }
+            return;
+        }
+        
+        this.stateVersion = data.version;
+        this.updateTamagotchiState({ ...this.currentState, ...data.changes });
+    }
+    
     updateTamagotchiState(state) {
         this.currentState = state;
         this.saveToLocalStorage();
@@ -394,14 +434,42 @@ class TamagotchiApp {
     }
     
     showSpeechBubble(text) {
+        this.speechStreamId = null;
         this.speechText.textContent = text;
         this.speechBubble.classList.add('show');
         
         // Start talking animation
         this.startTalkingAnimation();
         
+        this.scheduleSpeechHide();
+    }
+    
+    appendSpeechText(streamId, text) {
+        // The first piece of a new reply replaces whatever was shown before
+        if (streamId !== this.speechStreamId) {
+            this.speechStreamId = streamId;
+            clearTimeout(this.speechHideTimer);
+            this.speechText.textContent = '';
+            this.speechBubble.classList.add('show');
+            this.startTalkingAnimation();
+        }
+        this.speechText.textContent += text;
+    }
+    
+    finishSpeechStream(streamId, response) {
+        if (streamId !== this.speechStreamId) {
+            this.showSpeechBubble(response);
+            return;
+        }
+        this.speechText.textContent = response;
+        this.speechStreamId = null;
+        this.scheduleSpeechHide();
+    }
+    
+    scheduleSpeechHide() {
         // Hide after 5 seconds
-        setTimeout(() => {
+        clearTimeout(this.speechHideTimer);
+        this.speechHideTimer = setTimeout(() => {
             this.speechBubble.classList.remove('show');
             this.stopTalkingAnimation();
         }, 5000);